@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ESYBOT BENCHMARKS
+Usage: python bench.py [name ...] [--n=N]
+"""
+
+import io
+import os
+import sys
+import time
+import datetime
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import redirect_stdout
+
+from aiogram.types import Message, CallbackQuery, Chat, User
+
+from main import FinalESYBOTInterpreter, UpdateContext, load_telegram
+
+
+def measure(func, n: int):
+    """Run func n times, return (us per call, bytes kept per call)"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    kept = [func() for _ in range(n)]
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del kept
+    return elapsed / n * 1e6, size / n
+
+
+def eager_context(update):
+    """Context dict as handler_func built it before UpdateContext"""
+    context = {
+        'update': update,
+        'user_id': 0,
+        'first_name': '',
+        'username': '',
+        'text': '',
+        'data': '',
+        'chat_id': 0,
+    }
+    if isinstance(update, CallbackQuery):
+        context.update({
+            'user_id': update.from_user.id,
+            'first_name': update.from_user.first_name or '',
+            'username': f"@{update.from_user.username}" if update.from_user.username else '',
+            'chat_id': update.message.chat.id if update.message else update.from_user.id,
+            'text': update.data or '',
+            'data': update.data or '',
+        })
+    elif isinstance(update, Message):
+        context.update({
+            'user_id': update.from_user.id if update.from_user else 0,
+            'first_name': update.from_user.first_name or '' if update.from_user else '',
+            'username': f"@{update.from_user.username}" if update.from_user and update.from_user.username else '',
+            'chat_id': update.chat.id,
+            'text': update.text or update.caption or '',
+            'data': '',
+        })
+    return context
+
+
+def bench_context(n: int) -> None:
+    """Per-update context allocation"""
+    load_telegram()
+    message = Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=42, type='private'),
+        from_user=User(id=7, is_bot=False, first_name='Bench', username='bench'),
+        text='hello',
+    )
+
+    def lazy_context():
+        context = UpdateContext(message)
+        context['text']
+        return context
+
+    for name, func in (('dict (eager)', lambda: eager_context(message)), ('UpdateContext', lazy_context)):
+        us, size = measure(func, n)
+        print(f"   {name:<16} {us:8.2f} us/update {size:8.1f} B/update")
+
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.load_telegram()
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def make_script(handlers: int) -> str:
+    """Large .esi script: menus, handlers with commands and Python blocks"""
+    parts = ['bot_token "YOUR_TOKEN_HERE"', 'set counter 0']
+    for i in range(handlers):
+        parts.append(f'menu menu{i} {{\n button "Item {i}" -> "item{i}" new_row\n button "Back" -> "back"\n}}')
+        parts.append(
+            f'on_callback item{i} {{\n'
+            f' send "Item {i} for $first_name"\n'
+            f' python {{\n'
+            f'  total = esybot_get("counter", 0) + {i}\n'
+            f'  esybot_set("counter", total)\n'
+            f' }}\n'
+            f' edit "Done {i}" keyboard=menu{i}\n'
+            f'}}'
+        )
+    return '\n'.join(parts) + '\n'
+
+
+def bench_startup(n: int) -> None:
+    """Import time and parse + compile time of a large script (n/100 handlers)"""
+    runs = []
+    for _ in range(3):
+        output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+        runs.append([float(value) for value in output.split()])
+    import_time, telegram_time = min(runs)
+    print(f"   {'import main':<16} {import_time * 1000:8.1f} ms")
+    print(f"   {'load_telegram':<16} {telegram_time * 1000:8.1f} ms (deferred to run_interpreter)")
+
+    handlers = max(1, n // 100)
+    with tempfile.NamedTemporaryFile('w', suffix='.esi', delete=False, encoding='utf-8') as f:
+        f.write(make_script(handlers))
+    try:
+        size = os.path.getsize(f.name)
+        interpreter = FinalESYBOTInterpreter()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            ok = interpreter.check_file(f.name)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.unlink(f.name)
+    buttons = sum(len(menu['buttons']) for menu in interpreter.keyboards.values())
+    assert len(interpreter.keyboards) == handlers and buttons == 2 * handlers, (len(interpreter.keyboards), buttons)
+    print(f"   {'--check':<16} {elapsed * 1000:8.1f} ms for {handlers} handlers, {size / 1024:.0f} KB"
+          f"{'' if ok else ' (errors)'}")
+
+
+BUDGET_BLOCK = """
+items = [{'id': i, 'price': i * 3 % 17} for i in range(50)]
+total = 0
+for item in items:
+    if item['price'] > 5:
+        total += item['price']
+label = f"{len(items)} items, total {total}"
+"""
+
+
+def bench_budget(n: int) -> None:
+    """Python block overhead of execution budgets (n/10 block runs)"""
+    import asyncio
+    interpreter = FinalESYBOTInterpreter()
+    default = dict(interpreter.python_budget)
+    variants = (
+        ('no budget', {'time': 0, 'steps': 0, 'memory': 0}),
+        ('default', default),
+        ('+ steps', {**default, 'steps': 10000000}),
+        ('+ memory 64MB', {**default, 'memory': 64 * 1048576}),
+    )
+    runs = max(1, n // 10)
+
+    async def run(budget):
+        interpreter.python_budget = budget
+        start = time.perf_counter()
+        for _ in range(runs):
+            await interpreter._execute_python_code(BUDGET_BLOCK, {})
+        return (time.perf_counter() - start) / runs * 1e6
+
+    base = None
+    for name, budget in variants:
+        us = asyncio.run(run(budget))
+        base = base or us
+        print(f"   {name:<16} {us:8.2f} us/block {(us / base - 1) * 100:+7.1f}%")
+
+
+BENCHMARKS = {
+    'context': bench_context,
+    'startup': bench_startup,
+    'budget': bench_budget,
+}
+
+
+def main():
+    n = 100000
+    names = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--n='):
+            n = int(arg[4:])
+        else:
+            names.append(arg)
+
+    print("📈 ESYBOT benchmarks")
+    print("=" * 60)
+    for name in names or BENCHMARKS:
+        print(f"⏱️ {name}: {BENCHMARKS[name].__doc__} (n={n})")
+        BENCHMARKS[name](n)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,11 @@ ESYBOT FINAL WIKI-COMPATIBLE INTERPRETER
 ✅ Fixed buttons ✅ Fixed Python blocks ✅ 100% Wiki-compatibility
 """
 
+from __future__ import annotations
+
 import asyncio
+import ast
+import inspect
 import sys
 import os
 import re
@@ -15,33 +19,1032 @@ import datetime
 import json
 import math
 import time
-from typing import Dict, List, Any, Optional, Tuple, Union
+import hashlib
+import base64
+import csv
+import mmap
+import pickle
+import types
+import signal
+import threading
+import tracemalloc
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from urllib.parse import urlsplit
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import aiohttp
+
+try:
+    import fcntl
+except ImportError:  # Windows: payload saves are not locked
+    fcntl = None
+
+
+def load_telegram() -> None:
+    """Import aiogram into module globals
+    
+    aiogram and its pydantic models take seconds to import, so parsing
+    and --check runs never load them; run_interpreter calls this first.
+    """
+    global Bot, Dispatcher, F, Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+    global ReplyKeyboardMarkup, KeyboardButton, FSInputFile, InlineQuery, InlineQueryResultArticle
+    global InputTextMessageContent, Command, FSMContext, MemoryStorage, InlineKeyboardBuilder
+    global ReplyKeyboardBuilder, AiohttpSession, TelegramAPIServer
+    
+    from aiogram import Bot, Dispatcher, F
+    from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton, FSInputFile
+    from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+    from aiogram.filters import Command
+    from aiogram.fsm.context import FSMContext
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+
+class TimingWheel:
+    """Hierarchical timing wheel for scheduled ESYBOT blocks
+    
+    Each level has `slots` buckets; level N covers slots**(N+1) ticks.
+    Adding a timer and firing it are O(1) amortized, so millions of
+    pending timers cost one tuple each.
+    """
+    
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.overflow: List[Tuple[int, float, Any]] = []
+        self.current = int(time.time() / tick)
+        self.count = 0
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def add(self, due: float, item: Any) -> None:
+        """Schedule item to fire at unix time `due`"""
+        due_tick = max(math.ceil(due / self.tick), self.current + 1)
+        self._place((due_tick, due, item))
+        self.count += 1
+    
+    def _place(self, entry: Tuple[int, float, Any]) -> None:
+        due_tick = entry[0]
+        delta = due_tick - self.current
+        span = 1
+        for level in range(self.levels):
+            if delta < span * self.slots:
+                self.wheels[level][(due_tick // span) % self.slots].append(entry)
+                return
+            span *= self.slots
+        self.overflow.append(entry)
+    
+    def advance(self, now: float) -> List[Tuple[float, Any]]:
+        """Move the wheel up to `now` and return (due, item) of fired timers"""
+        target = int(now / self.tick)
+        fired = []
+        while self.current < target:
+            self.current += 1
+            
+            # Cascade upper levels whose bucket starts at this tick
+            span = self.slots
+            for level in range(1, self.levels + 1):
+                if self.current % span:
+                    break
+                if level == self.levels:
+                    bucket, self.overflow = self.overflow, []
+                else:
+                    slot = (self.current // span) % self.slots
+                    bucket = self.wheels[level][slot]
+                    self.wheels[level][slot] = []
+                for entry in bucket:
+                    self._place(entry)
+                span *= self.slots
+            
+            slot = self.current % self.slots
+            bucket = self.wheels[0][slot]
+            self.wheels[0][slot] = []
+            for entry in bucket:
+                fired.append((entry[1], entry[2]))
+            self.count -= len(bucket)
+        return fired
+    
+    def items(self):
+        """Iterate (due, item) of all pending timers"""
+        for wheel in self.wheels:
+            for bucket in wheel:
+                for entry in bucket:
+                    yield entry[1], entry[2]
+        for entry in self.overflow:
+            yield entry[1], entry[2]
 
-from aiogram import Bot, Dispatcher, F
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
-from aiogram.filters import Command
-from aiogram.fsm.context import FSMContext
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
+class TTLCache:
+    """Bounded LRU cache with per-entry expiry"""
+    
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    def __contains__(self, key: Any) -> bool:
+        entry = self.data.get(key)
+        return entry is not None and (entry[0] is None or entry[0] > time.monotonic())
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        entry = self.data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self.data[key]
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+    
+    def pop(self, key: Any, default: Any = None) -> Any:
+        entry = self.data.pop(key, None)
+        return default if entry is None else entry[1]
+
+class TokenBucketLimiter:
+    """Token buckets per key; idle buckets expire once they would be full"""
+    
+    def __init__(self, rate: float, burst: int, maxsize: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = TTLCache(maxsize=maxsize, ttl=burst / rate)
+    
+    def allow(self, key: Any) -> bool:
+        now = time.monotonic()
+        state = self.buckets.get(key)
+        if state is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, state[0] + (now - state[1]) * self.rate)
+        
+        if tokens < 1:
+            self.buckets.set(key, (tokens, now))
+            return False
+        self.buckets.set(key, (tokens - 1, now))
+        return True
+
+class PayloadStore:
+    """Persistent LRU table of callback payloads that exceed 64 bytes
+    
+    Buttons carry a short id derived from the payload hash, so the same
+    payload gets the same id on every restart and every worker. Workers
+    sharing one file merge it under a file lock on every save.
+    """
+    
+    PREFIX = '~'
+    
+    def __init__(self, maxsize: int = 100000, save_interval: float = 30.0):
+        self.maxsize = maxsize
+        self.save_interval = save_interval
+        self.data: OrderedDict = OrderedDict()
+        self.path: Optional[str] = None
+        self.dirty = False
+        self.saved_at = time.monotonic()
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    @classmethod
+    def make_id(cls, payload: str) -> str:
+        digest = hashlib.blake2b(payload.encode('utf-8'), digest_size=9).digest()
+        return cls.PREFIX + base64.urlsafe_b64encode(digest).decode('ascii')
+    
+    def put(self, payload: str) -> str:
+        """Store payload and return its callback id"""
+        key = self.make_id(payload)
+        if key in self.data:
+            self.data.move_to_end(key)
+            return key
+        
+        self.data[key] = payload
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+        self.dirty = True
+        if self.path and time.monotonic() - self.saved_at >= self.save_interval:
+            self.save()
+        return key
+    
+    def get(self, key: str) -> Optional[str]:
+        payload = self.data.get(key)
+        if payload is not None:
+            self.data.move_to_end(key)
+        return payload
+    
+    def load(self, path: str) -> None:
+        """Load saved payloads; entries created at parse time stay newest"""
+        self.path = path
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                loaded = OrderedDict(json.load(f))
+            loaded.update(self.data)
+            self.data = loaded
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+    
+    def save(self) -> None:
+        """Write payloads, merged with what other workers saved meanwhile"""
+        if not self.path or not self.dirty:
+            return
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = OrderedDict(json.load(f))
+                saved.update(self.data)
+                self.data = saved
+                while len(self.data) > self.maxsize:
+                    self.data.popitem(last=False)
+            
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+class VariableStore(dict):
+    """Script variables with a version counter per name"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.versions: Dict[str, int] = {}
+        self.update(*args, **kwargs)
+    
+    def __setitem__(self, key: str, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.touch(key)
+    
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self.touch(key)
+    
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+    
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def pop(self, key: str, *default) -> Any:
+        if key in self:
+            self.touch(key)
+        return super().pop(key, *default)
+    
+    def touch(self, key: str) -> None:
+        """Mark variable as changed (e.g. list mutated in place)"""
+        self.versions[key] = self.versions.get(key, 0) + 1
+    
+    def version(self, key: str) -> int:
+        return self.versions.get(key, 0)
+
+class DataTable:
+    """Read-only table from CSV/JSON/JSONL with hash indexes
+    
+    Small files are stored column-wise. Large CSV/JSONL files stay
+    memory-mapped and only row offsets plus indexes live in memory.
+    """
+    
+    MMAP_THRESHOLD = 16 * 1024 * 1024
+    CHECK_INTERVAL = 2.0
+    
+    def __init__(self, path: str, key: Optional[str] = None, index: List[str] = None,
+                 use_mmap: Optional[bool] = None):
+        self.path = path
+        self.key = key
+        self.index_columns = list(index or [])
+        self.use_mmap = use_mmap
+        self.fields: List[str] = []
+        self.columns: Dict[str, list] = {}
+        self.offsets: Optional[array] = None
+        self.mm: Optional[mmap.mmap] = None
+        self.rows = 0
+        self.key_index: Dict[str, int] = {}
+        self.indexes: Dict[str, Dict[str, List[int]]] = {}
+        self.mtime = None
+        self.checked_at = 0.0
+        self.error: Optional[Exception] = None
+        self.load()
+    
+    def load(self) -> None:
+        """(Re)load file and rebuild indexes
+        
+        The new data is built on a staging copy and swapped in only after
+        the whole file parsed, so a broken or half-written file leaves the
+        previous data in place.
+        """
+        stat = os.stat(self.path)
+        mapped = self.use_mmap if self.use_mmap is not None else stat.st_size >= self.MMAP_THRESHOLD
+        
+        staged = object.__new__(type(self))
+        staged.__dict__.update(self.__dict__)
+        staged.format = os.path.splitext(self.path)[1].lower().lstrip('.')
+        staged.fields, staged.columns, staged.offsets, staged.mm = [], {}, None, None
+        staged.rows = 0
+        staged.key_index = {}
+        staged.indexes = {column: {} for column in self.index_columns}
+        
+        try:
+            if mapped and staged.format in ('csv', 'jsonl'):
+                staged._load_mapped()
+            else:
+                staged._load_columns()
+        except Exception:
+            if staged.mm is not None:
+                staged.mm.close()
+            raise
+        
+        old_mm = self.mm
+        self.__dict__.update(staged.__dict__)
+        if old_mm is not None:
+            old_mm.close()
+        self.mtime = stat.st_mtime
+        self.checked_at = time.monotonic()
+    
+    def _load_columns(self) -> None:
+        with open(self.path, 'r', encoding='utf-8-sig', newline='') as f:
+            if self.format == 'csv':
+                reader = csv.DictReader(f)
+                self.fields = list(reader.fieldnames or [])
+                self.columns = {field: [] for field in self.fields}
+                records = reader
+            elif self.format == 'jsonl':
+                records = (json.loads(line) for line in f if line.strip())
+            else:
+                records = json.load(f)
+            
+            for record in records:
+                for field in record:
+                    if field not in self.columns:
+                        self.fields.append(field)
+                        self.columns[field] = [None] * self.rows
+                for field in self.fields:
+                    self.columns[field].append(record.get(field))
+                self._index_record(self.rows, record)
+                self.rows += 1
+    
+    def _load_mapped(self) -> None:
+        with open(self.path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets = array('q')
+        
+        offset = 0
+        if self.format == 'csv':
+            end = self._record_end(0)
+            self.fields = next(csv.reader([self.mm[0:end].decode('utf-8-sig')]))
+            offset = end + 1
+        
+        size = len(self.mm)
+        while offset < size:
+            end = self._record_end(offset)
+            if self.mm[offset:end].strip():
+                record = self._parse_record(offset, end)
+                self.offsets.append(offset)
+                self._index_record(self.rows, record)
+                self.rows += 1
+            offset = end + 1
+    
+    def _record_end(self, offset: int) -> int:
+        """End of record starting at offset; quoted CSV fields may hold newlines"""
+        end = self.mm.find(b'\n', offset)
+        if self.format == 'csv':
+            while end != -1 and self.mm[offset:end].count(b'"') % 2:
+                end = self.mm.find(b'\n', end + 1)
+        return len(self.mm) if end == -1 else end
+    
+    def _parse_record(self, offset: int, end: int) -> Dict[str, Any]:
+        text = self.mm[offset:end].decode('utf-8')
+        if self.format == 'jsonl':
+            return json.loads(text)
+        return dict(zip(self.fields, next(csv.reader([text]))))
+    
+    def _index_record(self, row: int, record: Dict[str, Any]) -> None:
+        if self.key:
+            self.key_index[str(record.get(self.key))] = row
+        for column, index in self.indexes.items():
+            index.setdefault(str(record.get(column)), []).append(row)
+    
+    def _check(self) -> None:
+        """Reload when the file changed; checked at most every CHECK_INTERVAL"""
+        if time.monotonic() - self.checked_at < self.CHECK_INTERVAL:
+            return
+        self.checked_at = time.monotonic()
+        try:
+            if os.stat(self.path).st_mtime != self.mtime:
+                self.load()
+            self.error = None
+        except Exception as e:
+            # Keep serving the previous data
+            self.error = e
+    
+    def row(self, i: int) -> Dict[str, Any]:
+        if self.offsets is not None:
+            offset = self.offsets[i]
+            return self._parse_record(offset, self._record_end(offset))
+        return {field: self.columns[field][i] for field in self.fields}
+    
+    def __len__(self) -> int:
+        self._check()
+        return self.rows
+    
+    def __iter__(self):
+        self._check()
+        for i in range(self.rows):
+            yield self.row(i)
+    
+    def __contains__(self, key: Any) -> bool:
+        self._check()
+        return str(key) in self.key_index
+    
+    def __getitem__(self, key: Any) -> Dict[str, Any]:
+        row = self.get(key)
+        if row is None:
+            raise KeyError(key)
+        return row
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Row by key column"""
+        self._check()
+        i = self.key_index.get(str(key))
+        return default if i is None else self.row(i)
+    
+    def where(self, **conditions: Any) -> List[Dict[str, Any]]:
+        """Rows matching all column=value conditions, using indexes where possible"""
+        self._check()
+        rows = None
+        for column, value in conditions.items():
+            if column in self.indexes:
+                found = self.indexes[column].get(str(value), [])
+                if rows is None:
+                    rows = found
+                else:
+                    found = set(found)
+                    rows = [i for i in rows if i in found]
+        
+        candidates = (self.row(i) for i in (range(self.rows) if rows is None else rows))
+        return [
+            record for record in candidates
+            if all(str(record.get(column)) == str(value) for column, value in conditions.items())
+        ]
+
+class TaskPool:
+    """Background tasks with bounded concurrency, cancelled on shutdown"""
+    
+    def __init__(self, limit: int = 16, on_error=None):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.tasks: set = set()
+        self.on_error = on_error
+    
+    def __len__(self) -> int:
+        return len(self.tasks)
+    
+    def set_limit(self, limit: int) -> None:
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+    
+    def spawn(self, coro, name: str = 'task', on_done=None) -> asyncio.Task:
+        """Schedule coroutine; on_done(result) runs after it succeeds"""
+        task = asyncio.create_task(self._run(coro, name, on_done))
+        self.tasks.add(task)
+        
+        def finished(task: asyncio.Task) -> None:
+            self.tasks.discard(task)
+            # Cancelled while waiting to start: close the coroutine quietly
+            if inspect.iscoroutine(coro) and inspect.getcoroutinestate(coro) == inspect.CORO_CREATED:
+                coro.close()
+        
+        task.add_done_callback(finished)
+        return task
+    
+    async def _run(self, coro, name: str, on_done) -> Any:
+        try:
+            async with self.semaphore:
+                result = await coro
+                if on_done is not None:
+                    await on_done(result)
+                return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.on_error is not None:
+                self.on_error(name, e)
+    
+    async def shutdown(self) -> int:
+        """Cancel running tasks and wait for them to finish"""
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return len(tasks)
+
+class FetchClient:
+    """Keep-alive HTTP client for scripts with per-host limits and TTL/ETag cache"""
+    
+    def __init__(self, limit: int = 100, per_host: int = 8, maxsize: int = 1000):
+        self.limit = limit
+        self.per_host = per_host
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.cache = TTLCache(maxsize=maxsize)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.per_host, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+    
+    async def fetch(self, url: str, timeout: float = 10.0, cache: float = 0.0, method: str = 'GET',
+                    headers: Optional[Dict[str, str]] = None, json_body: Any = None) -> Any:
+        """Request url; JSON responses are decoded, others returned as text"""
+        method = method.upper()
+        # Responses to different headers (e.g. Authorization) are cached apart
+        key = (url, tuple(sorted((name.lower(), value) for name, value in (headers or {}).items())))
+        entry = self.cache.get(key) if method == 'GET' else None
+        if entry is not None and entry['expires'] > time.monotonic():
+            return entry['body']
+        
+        # Expired entry with validators: revalidate instead of downloading again
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+        
+        host = urlsplit(url).netloc
+        limit = self.host_limits.get(host)
+        if limit is None:
+            limit = self.host_limits[host] = asyncio.Semaphore(self.per_host)
+        
+        async with limit:
+            import aiohttp
+            session = await self._get_session()
+            async with session.request(method, url, headers=request_headers, json=json_body,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status == 304 and entry is not None:
+                    entry['expires'] = time.monotonic() + cache
+                    self.cache.set(key, entry)
+                    return entry['body']
+                
+                response.raise_for_status()
+                if response.content_type == 'application/json' or response.content_type.endswith('+json'):
+                    body = await response.json(content_type=None)
+                else:
+                    body = await response.text()
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        
+        if method == 'GET' and (cache > 0 or etag or last_modified):
+            self.cache.set(key, {
+                'expires': time.monotonic() + cache,
+                'etag': etag,
+                'last_modified': last_modified,
+                'body': body,
+            })
+        return body
+    
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+class BudgetExceeded(BaseException):
+    """Python block went over its execution budget
+    
+    A BaseException, so `except Exception` inside the block can't swallow it.
+    """
+    
+    def __init__(self, kind: str, limit: Any, line: int):
+        super().__init__(kind, limit, line)
+        self.kind = kind
+        self.limit = limit
+        self.line = line
+
+
+class ExecutionBudget:
+    """Wall time, step and memory limits for one Python block run
+    
+    Wall time costs a timer per synchronous step of the block: SIGALRM
+    fires at the deadline and its handler, which runs on the event loop
+    thread between bytecodes, raises BudgetExceeded only while a frame of
+    the block is on the interrupted stack, so other code is never hit.
+    Sleeps are cut short, but a blocking C call (sum(range(10**9)), a
+    slow regex) can't be interrupted and is stopped once it returns.
+    Awaits are bounded by wait_for. Without SIGALRM, or off the main
+    thread, time is checked by the trace function instead.
+    
+    Steps and memory need a trace function, set only while a step of the
+    block runs and only for frames compiled from it, so other handlers
+    running during its awaits are neither traced nor charged. A step is
+    one executed line; a loop written on a single line counts once, so
+    only time stops it. Memory is checked every CHECK_EVERY steps.
+    
+    Memory is tracemalloc's peak within each step plus what earlier steps
+    kept allocated; tracemalloc is started for the step if it is off, so
+    frees of memory allocated before that go unseen and the limit is
+    approximate (on the high side).
+    """
+    
+    FILENAME = '<python block>'
+    CHECK_EVERY = 64
+    REFIRE = 0.05
+    
+    # Budget whose step runs now, for the SIGALRM handler, and the
+    # thread the handler was installed for
+    _current: Optional['ExecutionBudget'] = None
+    _alarm_thread: Optional[int] = None
+    
+    def __init__(self, time: float = 0, steps: int = 0, memory: int = 0):
+        self.time_limit = time
+        self.steps = steps
+        self.memory = memory
+        self.steps_used = 0
+        self.line = 0
+        self.deadline: Optional[float] = None
+        self.alarm = False
+        self.retained = 0
+        self.step_base = 0
+        self.peak = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.time_limit or self.steps or self.memory)
+    
+    @property
+    def traced(self) -> bool:
+        return bool(self.steps or self.memory or (self.deadline is not None and not self.alarm))
+    
+    def start(self) -> None:
+        if not self.time_limit:
+            return
+        self.deadline = time.perf_counter() + self.time_limit
+        self.alarm = threading.get_ident() == ExecutionBudget._alarm_thread or self._install_alarm()
+    
+    @staticmethod
+    def _install_alarm() -> bool:
+        """Set the SIGALRM handler; only possible on the main thread"""
+        if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signal.SIGALRM, ExecutionBudget._on_alarm)
+        ExecutionBudget._alarm_thread = threading.get_ident()
+        return True
+    
+    @staticmethod
+    def _on_alarm(signum, frame) -> None:
+        budget = ExecutionBudget._current
+        if budget is None or budget.deadline is None or time.perf_counter() < budget.deadline:
+            return
+        line = 0
+        while frame is not None:
+            if frame.f_code.co_filename == ExecutionBudget.FILENAME:
+                # A bare except could swallow this, so the block also stops at its next line
+                frame.f_trace = budget._trace_expired
+                line = line or frame.f_lineno
+            frame = frame.f_back
+        if line:
+            sys.settrace(budget._trace_expired)
+            raise BudgetExceeded('time', budget.time_limit, line)
+    
+    def _trace_expired(self, frame, event, arg):
+        if frame.f_code.co_filename != self.FILENAME:
+            return None
+        if event == 'line':
+            raise BudgetExceeded('time', self.time_limit, frame.f_lineno)
+        return self._trace_expired
+    
+    def _arm(self) -> None:
+        delay = max(self.deadline - time.perf_counter(), 1e-6)
+        signal.setitimer(signal.ITIMER_REAL, delay, self.REFIRE)
+    
+    def check(self) -> None:
+        """Raise BudgetExceeded if time or memory ran out"""
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise BudgetExceeded('time', self.time_limit, self.line)
+        if self.memory:
+            self.peak = max(self.peak, self.retained + tracemalloc.get_traced_memory()[1] - self.step_base)
+            if self.peak > self.memory:
+                raise BudgetExceeded('memory', self.memory, self.line)
+    
+    def _trace_call(self, frame, event, arg):
+        if frame.f_code.co_filename == self.FILENAME:
+            return self._trace_line
+        return None
+    
+    def _trace_line(self, frame, event, arg):
+        if event == 'line':
+            self.line = frame.f_lineno
+            self.steps_used += 1
+            if self.steps and self.steps_used > self.steps:
+                raise BudgetExceeded('steps', self.steps, self.line)
+            if not self.steps_used % self.CHECK_EVERY:
+                self.check()
+        return self._trace_line
+    
+    def call(self, func, *args) -> Any:
+        """Run func(*args), the block or one step of it, within the budget"""
+        if not self.enabled:
+            return func(*args)
+        
+        outer = ExecutionBudget._current
+        ExecutionBudget._current = self
+        if self.alarm:
+            self._arm()
+        started = False
+        if self.memory:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.step_base = tracemalloc.get_traced_memory()[0]
+        previous = sys.gettrace()
+        if self.traced:
+            sys.settrace(self._trace_call)
+        try:
+            return func(*args)
+        finally:
+            ExecutionBudget._current = outer
+            sys.settrace(previous)
+            if self.alarm:
+                if outer is not None and outer.alarm:
+                    outer._arm()
+                else:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                self.peak = max(self.peak, self.retained + peak - self.step_base)
+                self.retained += current - self.step_base
+                if started:
+                    tracemalloc.stop()
+    
+    @types.coroutine
+    def _drive(self, coro):
+        """Step the block's coroutine, each step within the budget"""
+        value, error = None, None
+        while True:
+            try:
+                if error is not None:
+                    yielded = self.call(coro.throw, error)
+                else:
+                    yielded = self.call(coro.send, value)
+            except StopIteration as stop:
+                return stop.value
+            if coro.cr_frame is not None:
+                self.line = coro.cr_frame.f_lineno
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+    
+    async def wait(self, coro) -> Any:
+        """Await block coroutine within the remaining time"""
+        if not self.enabled:
+            return await coro
+        
+        async def run():
+            return await self._drive(coro)
+        
+        if self.deadline is None:
+            return await run()
+        try:
+            return await asyncio.wait_for(run(), max(0.0, self.deadline - time.perf_counter()))
+        except asyncio.TimeoutError:
+            raise BudgetExceeded('time', self.time_limit, self.line) from None
+
+
+_UNSET = object()
+
+class UpdateContext(MutableMapping):
+    """Per-update context; fields are read from the update on first access
+    
+    Behaves like the old context dict (context['user_id'], context.get(),
+    context.update()) for templates, commands and Python blocks.
+    """
+    
+    FIELDS = ('update', 'user_id', 'first_name', 'username', 'text', 'data', 'chat_id')
+    __slots__ = ('event', '_user_id', '_first_name', '_username', '_text', '_data', '_chat_id', '_extra')
+    
+    def __init__(self, event: Any = None):
+        self.event = event
+        self._user_id = self._first_name = self._username = _UNSET
+        self._text = self._data = self._chat_id = _UNSET
+        self._extra: Optional[Dict[str, Any]] = None
+    
+    @property
+    def user(self) -> Any:
+        return getattr(self.event, 'from_user', None)
+    
+    @property
+    def user_id(self) -> int:
+        if self._user_id is _UNSET:
+            user = self.user
+            self._user_id = user.id if user else 0
+        return self._user_id
+    
+    @property
+    def first_name(self) -> str:
+        if self._first_name is _UNSET:
+            user = self.user
+            self._first_name = user.first_name or '' if user else ''
+        return self._first_name
+    
+    @property
+    def username(self) -> str:
+        if self._username is _UNSET:
+            user = self.user
+            self._username = f"@{user.username}" if user and user.username else ''
+        return self._username
+    
+    @property
+    def text(self) -> str:
+        if self._text is _UNSET:
+            if isinstance(self.event, CallbackQuery):
+                self._text = self.event.data or ''
+            elif isinstance(self.event, Message):
+                self._text = self.event.text or self.event.caption or ''
+            elif isinstance(self.event, InlineQuery):
+                self._text = self.event.query
+            else:
+                self._text = ''
+        return self._text
+    
+    @property
+    def data(self) -> str:
+        if self._data is _UNSET:
+            self._data = self.event.data or '' if isinstance(self.event, CallbackQuery) else ''
+        return self._data
+    
+    @property
+    def chat_id(self) -> int:
+        if self._chat_id is _UNSET:
+            if isinstance(self.event, CallbackQuery):
+                self._chat_id = self.event.message.chat.id if self.event.message else self.event.from_user.id
+            elif isinstance(self.event, Message):
+                self._chat_id = self.event.chat.id
+            elif isinstance(self.event, InlineQuery):
+                self._chat_id = self.event.from_user.id
+            else:
+                self._chat_id = 0
+        return self._chat_id
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == 'update':
+            return self.event
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+    
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == 'update':
+            self.event = value
+        elif key in self.FIELDS:
+            setattr(self, '_' + key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+    
+    def __delitem__(self, key: str) -> None:
+        if key in self.FIELDS or self._extra is None:
+            raise KeyError(key)
+        del self._extra[key]
+    
+    def __contains__(self, key: Any) -> bool:
+        return key in self.FIELDS or (self._extra is not None and key in self._extra)
+    
+    def __iter__(self):
+        yield from self.FIELDS
+        if self._extra is not None:
+            yield from self._extra
+    
+    def __len__(self) -> int:
+        return len(self.FIELDS) + (len(self._extra) if self._extra is not None else 0)
 
 class FinalESYBOTInterpreter:
     """Final ESYBOT interpreter with full Wiki-compatibility"""
     
+    # callback_data of paged_menu navigation, handled internally
+    PAGE_PREFIX = '#pg:'
+    
     def __init__(self, debug_mode: bool = False, lang: str = 'en'):
         self.debug = debug_mode
         self.lang = lang
         self.bot_token = ""
-        self.variables: Dict[str, Any] = {}
+        self.variables = VariableStore()
         self.handlers: List[Dict] = []
         self.keyboards: Dict[str, Any] = {}
+        self.parse_errors: List[Tuple[int, str]] = []
+        
+        # Default limits of every Python block run; 0 disables a limit.
+        # Time costs a timer per step; steps and memory trace the block
+        # (~3x slower), so they are opt-in
+        self.python_budget: Dict[str, Any] = {'time': 10.0, 'steps': 0, 'memory': 0}
+        
+        # Keyboards with $variables / for-loops, rendered per update
+        self.dynamic_keyboards: Dict[str, Dict] = {}
+        self.keyboard_cache = TTLCache(maxsize=1000)
+        
+        # paged_menu definitions; rendered pages share keyboard_cache
+        self.paged_menus: Dict[str, Dict] = {}
+        
+        # Data tables declared with `table name from "file"`
+        self.tables: Dict[str, DataTable] = {}
+        
+        # Memoized python(cache=...) blocks: (block id, key) -> outputs
+        self.python_cache = TTLCache(maxsize=10000)
+        self.python_cache_stats: Dict[str, Dict[str, int]] = {}
+        self._compiled_python: Dict[str, Tuple[Any, frozenset, int]] = {}
+        
+        # fetch command / esybot_fetch
+        self.fetch_client = FetchClient()
+        
+        # on_inline result sets: (handler, user if personal, query) -> results
+        self.inline_cache = TTLCache(maxsize=5000)
         self.bot: Optional[Bot] = None
         self.dp: Optional[Dispatcher] = None
+        self.script_path = ""
+        
+        # Bot API HTTP session (script `http` / `api_server`, CLI --http-*, --api)
+        self.http_settings: Dict[str, Any] = {
+            'api': None,
+            'local': False,
+            'limit': 100,
+            'per_host': 0,
+            'keepalive': 15.0,
+            'dns_cache': 3600,
+            'timeout': 60.0,
+        }
+        
+        # Scheduled blocks (every / at / after) and their timing wheel
+        self.timer_blocks: Dict[str, Dict] = {}
+        self.timer_wheel = TimingWheel()
+        self._timers_dirty = False
+        
+        # spawn blocks and esybot_spawn(), bounded by spawn_limit
+        self.task_pool = TaskPool(on_error=self._log_task_error)
+        
+        # Fired timers get their own pool, so slow background jobs
+        # can't delay every/at blocks
+        self.timer_pool = TaskPool(limit=1000, on_error=self._log_task_error)
+        
+        # Uploaded media: path -> {mtime, size, file_id: {kind: id}}
+        self.file_ids: Dict[str, Dict] = {}
+        
+        # Repeated callback taps and last edit state per message
+        self.recent_callbacks = TTLCache(maxsize=10000)
+        self.last_edits = TTLCache(maxsize=10000, ttl=3600)
+        
+        # Coalesced edits: (chat_id, message_id) -> latest pending state
+        self.pending_edits: Dict[Tuple[int, int], Tuple] = {}
+        self.edit_flush_tasks: Dict[Tuple[int, int], asyncio.Task] = {}
+        self.edit_sent_at = TTLCache(maxsize=10000)
+        
+        # Inbound flood control: scope ('user' / 'chat') -> limiter
+        self.throttles: Dict[str, TokenBucketLimiter] = {}
+        self.throttled_commands: List[Dict] = []
+        self.throttle_notices = TTLCache(maxsize=10000)
+        
+        # Long callback_data behind short stable ids
+        self.payloads = PayloadStore()
         
         # Translation dictionary
         self.texts = {
             'en': {
                 'parsing_file': "📝 Parsing file: {}",
                 'parsing_completed': "✅ Wiki-compatible parsing completed:",
+                'check_stats': "   🔍 Commands: {}, Python blocks: {}, timer blocks: {}, tables: {}",
+                'check_keyboards': "   ⌨️ Menus and keyboards: {}, buttons: {}",
+                'check_time': "   ⏱️ Parsed in {:.1f} ms, compiled in {:.1f} ms",
+                'check_no_token': "   ⚠️ No bot token specified",
+                'check_line_error': "❌ Line {}: {}",
+                'check_python_error': "❌ Python block in {} ({}): {}",
+                'check_passed': "✅ Check passed",
+                'check_failed': "❌ Check failed: {} errors",
                 'handlers_count': "   🎯 Handlers: {}",
                 'keyboards_count': "   ⌨️ Keyboards: {}",
                 'variables_count': "   📊 Variables: {}",
@@ -49,6 +1052,25 @@ class FinalESYBOTInterpreter:
                 'bot_token_found': "🔑 Bot token found",
                 'inline_menu_created': "⌨️ Created inline menu: {}",
                 'reply_keyboard_created': "⌨️ Created reply keyboard: {}",
+                'dynamic_keyboard_created': "⌨️ Created templated keyboard: {}",
+                'paged_menu_created': "⌨️ Created paged menu: {} (source: ${})",
+                'table_loaded': "🗂️ Loaded table {}: {} rows ({})",
+                'python_cache_hit': "   ♻️ Python cache hit: {} (hits {}, misses {})",
+                'python_cache_miss': "   🐍 Python cache miss: {} (hits {}, misses {})",
+                'python_cache_stats': "♻️ Python cache: {} hits, {} misses",
+                'function_spawn': "      • esybot_spawn(coro, then='Done: $result') - run in background",
+                'spawn_limit_set': "🧵 Background task limit: {}",
+                'task_error': "❌ Background task {} failed: {}",
+                'tasks_cancelled': "🧵 Cancelled background tasks: {}",
+                'function_fetch': "      • await esybot_fetch('url', timeout=2, cache=30) - HTTP request",
+                'fetch_pool_set': "🌐 Fetch pool: {} connections, {} per host",
+                'fetch_done': "   🌐 Fetched {} -> ${}",
+                'error_fetch_command': "❌ Error in fetch command: {}",
+                'inline_handler': "🔥 INLINE: from user {}, query: '{}', offset {}",
+                'inline_registered': "🔗 Inline handlers: {}",
+                'inline_prefix_reused': "   ♻️ Inline results filtered from query '{}'",
+                'error_result_command': "❌ Error in result command: {}",
+                'error_parsing_table': "⚠️ Error loading table: {}",
                 'handler_created': "🎯 Created handler: {} {}",
                 'var_debug': "📊 Variable: {} = {}",
                 'error_parsing_var': "⚠️ Error parsing variable: {}",
@@ -62,6 +1084,8 @@ class FinalESYBOTInterpreter:
                 'python_name_error': "❌ Variable not found in Python code: {}",
                 'python_syntax_error': "❌ Syntax error in Python code: {}",
                 'python_general_error': "❌ Python code execution error: {}",
+                'python_budget_exceeded': "⛔ Python block stopped: {} budget ({}) exceeded in {}, block line {}: {}",
+                'python_budget_set': "⛔ Python budget: time {}s, steps {}, memory {}MB",
                 'send_command': "   📤 Sent message: {}...",
                 'callback_answer': "   📝 Callback answer: {}",
                 'callback_handler': "🔥 CALLBACK: {} from user {}, data: '{}'",
@@ -98,10 +1122,38 @@ class FinalESYBOTInterpreter:
                 'error_callback_command': "❌ Error in answer_callback command: {}",
                 'error_set_command': "❌ Error in set command: {}",
                 'keyboard_used': "   📱 Using keyboard: {}",
+                'timer_created': "⏰ Created timer: {} {}",
+                'timers_loaded': "⏰ Pending timers: {}",
+                'timer_fired': "⏰ TIMER: {} (late {:.2f}s)",
+                'error_parsing_timer': "⚠️ Error parsing timer: {}",
+                'error_timers_file': "⚠️ Error in timers file: {}",
+                'media_uploaded': "   📤 Uploaded {}: {}",
+                'media_cached': "   📎 Sent cached {}: {}",
+                'error_media_command': "❌ Error in {} command: {}",
+                'error_file_ids': "⚠️ Error in file_id cache: {}",
+                'function_media': "      • await esybot_send_photo('path', caption='text') - send photo (also _document, _audio)",
+                'callback_duplicate': "   🔁 Duplicate callback skipped: {}",
+                'edit_skipped': "   ⏭️ Edit skipped, message not modified",
+                'edit_coalesced': "   🧩 Edit merged with pending edit",
+                'payload_missing': "   ⚠️ Unknown callback payload id: {}",
+                'error_payloads_file': "⚠️ Error in callback payloads file: {}",
+                'throttle_set': "🚦 Throttle {}: {} burst={}",
+                'http_session': "🌐 Bot API: {} (connections {}, per host {}, keep-alive {}s, timeout {}s)",
+                'error_http_settings': "⚠️ Error in HTTP settings: {}",
+                'update_throttled': "   🚦 Throttled {} {}",
+                'error_parsing_throttle': "⚠️ Error parsing throttle: {}",
             },
             'ru': {
                 'parsing_file': "📝 Парсинг файла: {}",
                 'parsing_completed': "✅ Wiki-совместимый парсинг завершён:",
+                'check_stats': "   🔍 Команд: {}, Python блоков: {}, блоков таймеров: {}, таблиц: {}",
+                'check_keyboards': "   ⌨️ Меню и клавиатур: {}, кнопок: {}",
+                'check_time': "   ⏱️ Парсинг {:.1f} мс, компиляция {:.1f} мс",
+                'check_no_token': "   ⚠️ Токен бота не указан",
+                'check_line_error': "❌ Строка {}: {}",
+                'check_python_error': "❌ Python блок в {} ({}): {}",
+                'check_passed': "✅ Проверка пройдена",
+                'check_failed': "❌ Проверка не пройдена: ошибок {}",
                 'handlers_count': "   🎯 Обработчиков: {}",
                 'keyboards_count': "   ⌨️ Клавиатур: {}",
                 'variables_count': "   📊 Переменных: {}",
@@ -109,6 +1161,25 @@ class FinalESYBOTInterpreter:
                 'bot_token_found': "🔑 Найден токен бота",
                 'inline_menu_created': "⌨️ Создано inline меню: {}",
                 'reply_keyboard_created': "⌨️ Создана reply клавиатура: {}",
+                'dynamic_keyboard_created': "⌨️ Создана шаблонная клавиатура: {}",
+                'paged_menu_created': "⌨️ Создано постраничное меню: {} (источник: ${})",
+                'table_loaded': "🗂️ Загружена таблица {}: {} строк ({})",
+                'python_cache_hit': "   ♻️ Попадание в кэш Python: {} (попаданий {}, промахов {})",
+                'python_cache_miss': "   🐍 Промах кэша Python: {} (попаданий {}, промахов {})",
+                'python_cache_stats': "♻️ Кэш Python: {} попаданий, {} промахов",
+                'function_spawn': "      • esybot_spawn(coro, then='Готово: $result') - выполнить в фоне",
+                'spawn_limit_set': "🧵 Лимит фоновых задач: {}",
+                'task_error': "❌ Ошибка фоновой задачи {}: {}",
+                'tasks_cancelled': "🧵 Отменено фоновых задач: {}",
+                'function_fetch': "      • await esybot_fetch('url', timeout=2, cache=30) - HTTP запрос",
+                'fetch_pool_set': "🌐 Пул fetch: {} соединений, {} на хост",
+                'fetch_done': "   🌐 Загружено {} -> ${}",
+                'error_fetch_command': "❌ Ошибка команды fetch: {}",
+                'inline_handler': "🔥 INLINE: от пользователя {}, запрос: '{}', offset {}",
+                'inline_registered': "🔗 Inline обработчиков: {}",
+                'inline_prefix_reused': "   ♻️ Inline результаты отфильтрованы из запроса '{}'",
+                'error_result_command': "❌ Ошибка команды result: {}",
+                'error_parsing_table': "⚠️ Ошибка загрузки таблицы: {}",
                 'handler_created': "🎯 Создан обработчик: {} {}",
                 'var_debug': "📊 Переменная: {} = {}",
                 'error_parsing_var': "⚠️ Ошибка парсинга переменной: {}",
@@ -122,6 +1193,8 @@ class FinalESYBOTInterpreter:
                 'python_name_error': "❌ Переменная не найдена в Python коде: {}",
                 'python_syntax_error': "❌ Синтаксическая ошибка в Python коде: {}",
                 'python_general_error': "❌ Ошибка выполнения Python кода: {}",
+                'python_budget_exceeded': "⛔ Python блок остановлен: превышен лимит {} ({}) в {}, строка блока {}: {}",
+                'python_budget_set': "⛔ Лимиты Python: время {}с, шагов {}, память {}МБ",
                 'send_command': "   📤 Отправлено сообщение: {}...",
                 'callback_answer': "   📝 Callback ответ: {}",
                 'callback_handler': "🔥 CALLBACK: {} от пользователя {}, data: '{}'",
@@ -158,6 +1231,26 @@ class FinalESYBOTInterpreter:
                 'error_callback_command': "❌ Ошибка команды answer_callback: {}",
                 'error_set_command': "❌ Ошибка команды set: {}",
                 'keyboard_used': "   📱 Используется клавиатура: {}",
+                'timer_created': "⏰ Создан таймер: {} {}",
+                'timers_loaded': "⏰ Ожидающих таймеров: {}",
+                'timer_fired': "⏰ ТАЙМЕР: {} (опоздание {:.2f}с)",
+                'error_parsing_timer': "⚠️ Ошибка парсинга таймера: {}",
+                'error_timers_file': "⚠️ Ошибка файла таймеров: {}",
+                'media_uploaded': "   📤 Загружено {}: {}",
+                'media_cached': "   📎 Отправлено из кэша {}: {}",
+                'error_media_command': "❌ Ошибка команды {}: {}",
+                'error_file_ids': "⚠️ Ошибка кэша file_id: {}",
+                'function_media': "      • await esybot_send_photo('path', caption='текст') - отправить фото (также _document, _audio)",
+                'callback_duplicate': "   🔁 Повторный callback пропущен: {}",
+                'edit_skipped': "   ⏭️ Редактирование пропущено, сообщение не изменилось",
+                'edit_coalesced': "   🧩 Редактирование объединено с ожидающим",
+                'payload_missing': "   ⚠️ Неизвестный id callback payload: {}",
+                'error_payloads_file': "⚠️ Ошибка файла callback payloads: {}",
+                'throttle_set': "🚦 Ограничение {}: {} burst={}",
+                'http_session': "🌐 Bot API: {} (соединений {}, на хост {}, keep-alive {}с, таймаут {}с)",
+                'error_http_settings': "⚠️ Ошибка настроек HTTP: {}",
+                'update_throttled': "   🚦 Ограничен {} {}",
+                'error_parsing_throttle': "⚠️ Ошибка парсинга throttle: {}",
             }
         }
 
@@ -176,10 +1269,11 @@ class FinalESYBOTInterpreter:
                 content = f.read()
             
             print(self.t('parsing_file', filename))
+            self.script_path = filename
             self._parse_content(content)
             print(self.t('parsing_completed'))
             print(self.t('handlers_count', len(self.handlers)))
-            print(self.t('keyboards_count', len(self.keyboards)))
+            print(self.t('keyboards_count', len(self.keyboards) + len(self.dynamic_keyboards) + len(self.paged_menus)))
             print(self.t('variables_count', len(self.variables)))
             return True
             
@@ -187,6 +1281,46 @@ class FinalESYBOTInterpreter:
             print(self.t('error_parsing', e))
             return False
     
+    def check_file(self, filename: str) -> bool:
+        """Parse script and compile its Python blocks without Bot or network"""
+        start = time.perf_counter()
+        if not self.parse_file(filename):
+            return False
+        parsed = time.perf_counter()
+        
+        blocks = [(f"{handler['type']} {handler['arg']}".strip(), handler['commands']) for handler in self.handlers]
+        blocks += [(timer['kind'], timer['commands']) for timer in self.timer_blocks.values()]
+        commands = python_blocks = 0
+        errors = [self.t('check_line_error', line, error) for line, error in self.parse_errors]
+        while blocks:
+            name, block = blocks.pop()
+            for command in block:
+                commands += 1
+                if command['type'] in ('parallel', 'spawn'):
+                    blocks.append((name, command['commands']))
+                elif command['type'] == 'python':
+                    python_blocks += 1
+                    try:
+                        self._compile_python(command['code'])
+                    except SyntaxError as e:
+                        # Report the line in the script, as _report_budget does
+                        where = f"{self.script_path or filename}:{command['line_no'] + (e.lineno or 1) - 1}" \
+                            if 'line_no' in command else f"line {e.lineno}"
+                        errors.append(self.t('check_python_error', name, where, e.msg))
+        compiled = time.perf_counter()
+        
+        keyboards = [*self.keyboards.values(), *self.dynamic_keyboards.values()]
+        buttons = sum(len(keyboard['buttons']) for keyboard in keyboards)
+        print(self.t('check_stats', commands, python_blocks, len(self.timer_blocks), len(self.tables)))
+        print(self.t('check_keyboards', len(keyboards) + len(self.paged_menus), buttons))
+        print(self.t('check_time', (parsed - start) * 1000, (compiled - parsed) * 1000))
+        if not self.bot_token or self.bot_token == "YOUR_TOKEN_HERE":
+            print(self.t('check_no_token'))
+        for error in errors:
+            print(error)
+        print(self.t('check_failed', len(errors)) if errors else self.t('check_passed'))
+        return not errors
+    
     def _parse_content(self, content: str) -> None:
         """Wiki-compatible content parsing"""
         lines = content.split('\n')
@@ -204,17 +1338,54 @@ class FinalESYBOTInterpreter:
                     self._parse_bot_token(line)
                 elif line.startswith('set '):
                     self._parse_variable(line)
+                elif line.startswith('throttle '):
+                    self._parse_throttle(line)
+                elif line.startswith('fetch_pool '):
+                    options = self._parse_options(line.split()[1:])
+                    self.fetch_client.limit = int(options.get('limit', self.fetch_client.limit))
+                    self.fetch_client.per_host = int(options.get('per_host', self.fetch_client.per_host))
+                    print(self.t('fetch_pool_set', self.fetch_client.limit, self.fetch_client.per_host))
+                elif line.startswith('http '):
+                    self.configure_http(self._parse_options(line.split()[1:]))
+                elif line.startswith('api_server '):
+                    match = re.search(r'"([^"]*)"', line)
+                    options = self._parse_options(line.split()[2:])
+                    if match:
+                        options['api'] = match.group(1)
+                    self.configure_http(options)
+                elif line.startswith('table '):
+                    self._parse_table(line)
+                elif line.startswith('python_budget '):
+                    self.python_budget.update(self._parse_budget(self._parse_options(line.split()[1:])))
+                    print(self.t('python_budget_set', self.python_budget['time'], self.python_budget['steps'],
+                                 self.python_budget['memory'] // 1048576))
+                elif line.startswith('spawn_limit '):
+                    self.task_pool.set_limit(max(1, int(line.split()[1])))
+                    print(self.t('spawn_limit_set', self.task_pool.limit))
                 elif line.startswith('menu '):
                     menu_data, next_i = self._parse_menu(lines, i)
-                    if menu_data:
-                        self.keyboards[menu_data['name']] = self._create_inline_keyboard(menu_data)
+                    if menu_data and self._is_dynamic_keyboard(menu_data):
+                        self.dynamic_keyboards[menu_data['name']] = menu_data
+                        print(self.t('dynamic_keyboard_created', menu_data['name']))
+                    elif menu_data:
+                        self.keyboards[menu_data['name']] = menu_data
                         print(self.t('inline_menu_created', menu_data['name']))
                     i = next_i
                     continue
+                elif line.startswith('paged_menu '):
+                    paged_data, next_i = self._parse_paged_menu(lines, i)
+                    if paged_data:
+                        self.paged_menus[paged_data['name']] = paged_data
+                        print(self.t('paged_menu_created', paged_data['name'], paged_data['source']))
+                    i = next_i
+                    continue
                 elif line.startswith('keyboard '):
                     keyboard_data, next_i = self._parse_keyboard(lines, i)
-                    if keyboard_data:
-                        self.keyboards[keyboard_data['name']] = self._create_reply_keyboard(keyboard_data)
+                    if keyboard_data and self._is_dynamic_keyboard(keyboard_data):
+                        self.dynamic_keyboards[keyboard_data['name']] = keyboard_data
+                        print(self.t('dynamic_keyboard_created', keyboard_data['name']))
+                    elif keyboard_data:
+                        self.keyboards[keyboard_data['name']] = keyboard_data
                         print(self.t('reply_keyboard_created', keyboard_data['name']))
                     i = next_i
                     continue
@@ -225,8 +1396,15 @@ class FinalESYBOTInterpreter:
                         print(self.t('handler_created', handler_data['type'], handler_data['arg']))
                     i = next_i
                     continue
+                elif line.startswith('every ') or line.startswith('at '):
+                    timer_data, next_i = self._parse_handler(lines, i)
+                    if timer_data:
+                        self._register_timer(timer_data)
+                    i = next_i
+                    continue
                 
             except Exception as e:
+                self.parse_errors.append((i + 1, str(e)))
                 print(f"⚠️ Error in line {i+1}: {e}")
             
             i += 1
@@ -268,6 +1446,96 @@ class FinalESYBOTInterpreter:
         except Exception as e:
             print(self.t('error_parsing_var', e))
     
+    def configure_http(self, options: Dict[str, str]) -> None:
+        """Apply HTTP session options: api, local, limit, per_host, keepalive, dns_cache, timeout"""
+        try:
+            for key, value in options.items():
+                if key == 'api':
+                    self.http_settings['api'] = value or None
+                elif key == 'local':
+                    self.http_settings['local'] = str(value).lower() == 'true'
+                elif key in ('limit', 'per_host'):
+                    self.http_settings[key] = int(value)
+                elif key in ('keepalive', 'timeout', 'dns_cache'):
+                    self.http_settings[key] = self._parse_duration(str(value))
+                else:
+                    raise ValueError(f"Unknown http option: {key}")
+        except Exception as e:
+            print(self.t('error_http_settings', e))
+    
+    def _create_session(self) -> AiohttpSession:
+        """Pooled Bot API session from http_settings"""
+        settings = self.http_settings
+        kwargs = {'limit': settings['limit'], 'timeout': settings['timeout']}
+        if settings['api']:
+            kwargs['api'] = TelegramAPIServer.from_base(settings['api'], is_local=settings['local'])
+        session = AiohttpSession(**kwargs)
+        
+        # Connector options AiohttpSession has no arguments for;
+        # dns_cache=0 turns the cache off (aiohttp's None keeps entries forever)
+        dns_cache = int(settings['dns_cache'])
+        session._connector_init.update({
+            'limit_per_host': settings['per_host'],
+            'keepalive_timeout': settings['keepalive'],
+            'use_dns_cache': dns_cache > 0,
+            'ttl_dns_cache': dns_cache or None,
+        })
+        
+        print(self.t('http_session', settings['api'] or 'api.telegram.org', settings['limit'],
+                     settings['per_host'], settings['keepalive'], settings['timeout']))
+        return session
+    
+    def _parse_throttle(self, line: str) -> None:
+        """Parse throttle [user|chat] 5/s burst=10"""
+        try:
+            parts = line.split()[1:]
+            scope = 'user'
+            if parts and parts[0] in ('user', 'chat'):
+                scope = parts.pop(0)
+            
+            count, unit = parts[0].split('/')
+            rate = float(count) / self._parse_duration('1' + unit)
+            burst = int(self._parse_options(parts[1:]).get('burst', max(1, int(float(count)))))
+            
+            self.throttles[scope] = TokenBucketLimiter(rate, burst)
+            print(self.t('throttle_set', scope, parts[0], burst))
+            
+        except Exception as e:
+            print(self.t('error_parsing_throttle', e))
+    
+    def _script_relative(self, path: str) -> str:
+        """Resolve relative file path against the script directory"""
+        if os.path.isabs(path) or not self.script_path:
+            return path
+        return os.path.join(os.path.dirname(self.script_path), path)
+    
+    def _parse_table(self, line: str) -> None:
+        """Parse table name from "file.csv" key=col index=col1,col2 [mmap=true]"""
+        try:
+            match = re.match(r'table\s+(\w+)\s+from\s+"([^"]*)"(.*)', line)
+            if not match:
+                raise ValueError(line)
+            
+            name, path = match.group(1), match.group(2)
+            options = self._parse_options(match.group(3).split())
+            path = self._script_relative(path)
+            
+            use_mmap = None
+            if 'mmap' in options:
+                use_mmap = options['mmap'].lower() == 'true'
+            
+            table = DataTable(
+                path,
+                key=options.get('key'),
+                index=[column for column in options.get('index', '').split(',') if column],
+                use_mmap=use_mmap
+            )
+            self.tables[name] = table
+            print(self.t('table_loaded', name, len(table), 'mmap' if table.mm is not None else 'memory'))
+            
+        except Exception as e:
+            print(self.t('error_parsing_table', e))
+    
     def _parse_menu(self, lines: List[str], start: int) -> Tuple[Optional[Dict], int]:
         """Wiki-compatible inline menu parsing"""
         try:
@@ -294,15 +1562,7 @@ class FinalESYBOTInterpreter:
                 i += 1
             
             # Parse buttons
-            buttons = []
-            while i < len(lines) and lines[i].strip() != '}':
-                line = lines[i].strip()
-                if line.startswith('button '):
-                    button_info = self._parse_button(line)
-                    if button_info:
-                        buttons.append(button_info)
-                        self.debug_print(self.t('button_debug', button_info['text'], button_info.get('data', 'N/A')))
-                i += 1
+            buttons, i = self._parse_buttons(lines, i)
             
             menu_data = {
                 'type': 'inline',
@@ -316,6 +1576,36 @@ class FinalESYBOTInterpreter:
             print(self.t('error_parsing_menu', e))
             return None, start + 1
     
+    def _parse_paged_menu(self, lines: List[str], start: int) -> Tuple[Optional[Dict], int]:
+        """Parse paged_menu name source=$items per_page=8 [{ button template }]"""
+        try:
+            menu_line = lines[start].strip()
+            has_block = menu_line.endswith('{')
+            parts = (menu_line[:-1] if has_block else menu_line).split()
+            options = self._parse_options(parts[2:])
+            
+            if len(parts) < 2 or not options.get('source', '').startswith('$'):
+                return None, start + 1
+            
+            buttons = [{'text': '$item', 'data': '$item'}]
+            i = start + 1
+            if has_block:
+                buttons, i = self._parse_buttons(lines, i)
+                i += 1
+            
+            paged_data = {
+                'name': parts[1],
+                'source': options['source'][1:],
+                'var': options.get('as', 'item'),
+                'per_page': max(1, int(options.get('per_page', 8))),
+                'buttons': buttons,
+            }
+            return paged_data, i
+            
+        except Exception as e:
+            print(self.t('error_parsing_menu', e))
+            return None, start + 1
+    
     def _parse_keyboard(self, lines: List[str], start: int) -> Tuple[Optional[Dict], int]:
         """Wiki-compatible reply keyboard parsing"""
         try:
@@ -339,14 +1629,7 @@ class FinalESYBOTInterpreter:
                     return None, start + 1
                 i += 1
             
-            buttons = []
-            while i < len(lines) and lines[i].strip() != '}':
-                line = lines[i].strip()
-                if line.startswith('button '):
-                    button_info = self._parse_button(line)
-                    if button_info:
-                        buttons.append(button_info)
-                i += 1
+            buttons, i = self._parse_buttons(lines, i)
             
             keyboard_data = {
                 'type': 'reply',
@@ -360,6 +1643,26 @@ class FinalESYBOTInterpreter:
             print(self.t('error_parsing_menu', e))
             return None, start + 1
     
+    def _parse_buttons(self, lines: List[str], start: int) -> Tuple[List[Dict], int]:
+        """Parse button lines and `for item in $list { }` generators"""
+        buttons = []
+        i = start
+        while i < len(lines) and lines[i].strip() != '}':
+            line = lines[i].strip()
+            if line.startswith('button '):
+                button_info = self._parse_button(line)
+                if button_info:
+                    buttons.append(button_info)
+                    self.debug_print(self.t('button_debug', button_info['text'], button_info.get('data', 'N/A')))
+            elif line.startswith('for ') and line.endswith('{'):
+                match = re.match(r'for\s+(\w+)\s+in\s+\$(\w+)', line)
+                body, i = self._parse_buttons(lines, i + 1)
+                if match:
+                    buttons.append({'for': match.group(1), 'source': match.group(2), 'buttons': body})
+            i += 1
+        
+        return buttons, i
+    
     def _parse_handler(self, lines: List[str], start: int) -> Tuple[Optional[Dict], int]:
         """Wiki-compatible handler parsing"""
         try:
@@ -374,7 +1677,8 @@ class FinalESYBOTInterpreter:
                 return None, start + 1
             
             handler_type = parts[0]
-            handler_arg = parts[1] if len(parts) > 1 else ""
+            handler_arg = parts[1] if len(parts) > 1 and '=' not in parts[1] else ""
+            options = self._parse_options(parts[1:])
             
             self.debug_print(f"🔧 Parsing handler: {handler_type} {handler_arg}")
             
@@ -386,34 +1690,162 @@ class FinalESYBOTInterpreter:
                     return None, start + 1
                 i += 1
             
-            commands = []
-            while i < len(lines) and lines[i].strip() != '}':
-                line = lines[i].strip()
-                
-                if line and not line.startswith('#'):
-                    if line == 'python {':
-                        python_code, python_end = self._parse_python_block(lines, i)
-                        if python_code:
-                            commands.append({'type': 'python', 'code': python_code})
-                        i = python_end
-                        continue
-                    else:
-                        commands.append({'type': 'command', 'line': line})
-                
-                i += 1
+            commands, i = self._parse_command_block(lines, i)
+            self._label_python_blocks(commands, f"{handler_type} {handler_arg}".strip())
             
             handler_data = {
                 'type': handler_type,
                 'arg': handler_arg,
+                'options': options,
                 'commands': commands
             }
             
-            return handler_data, i + 1
+            return handler_data, i
             
         except Exception as e:
             print(self.t('error_parsing_handler', e))
             return None, start + 1
     
+    def _parse_command_block(self, lines: List[str], start: int) -> Tuple[List[Dict], int]:
+        """Parse commands up to the closing brace, including nested blocks"""
+        commands = []
+        i = start
+        while i < len(lines) and lines[i].strip() != '}':
+            line = lines[i].strip()
+            
+            if line and not line.startswith('#'):
+                python_match = re.fullmatch(r'python\s*(?:\((.*)\))?\s*\{', line)
+                if python_match:
+                    python_code, python_end = self._parse_python_block(lines, i)
+                    if python_code:
+                        first = i + 1
+                        while not lines[first].strip():
+                            first += 1
+                        command = {'type': 'python', 'code': python_code, 'line_no': first + 1}
+                        options = self._parse_options((python_match.group(1) or '').split())
+                        budget = self._parse_budget(options)
+                        if budget:
+                            # python(time=1s steps=100000 memory=16MB) { } - own budget
+                            command['budget'] = budget
+                        if 'cache' in options:
+                            # python(cache=60s key=$data) { } - memoized block
+                            command['cache'] = self._parse_duration(options['cache'])
+                            command['key'] = options.get('key', '')
+                            command['id'] = self._block_id('python', options['key'] if 'key' in options else '', [command])
+                        commands.append(command)
+                    i = python_end
+                    continue
+                elif line == 'parallel {':
+                    body, i = self._parse_command_block(lines, i + 1)
+                    commands.append({'type': 'parallel', 'commands': body})
+                    continue
+                elif line == 'spawn {':
+                    body, i = self._parse_command_block(lines, i + 1)
+                    commands.append({'type': 'spawn', 'commands': body})
+                    continue
+                elif line.startswith('after ') and line.endswith('{'):
+                    delay_str = line[6:-1].strip()
+                    body, i = self._parse_command_block(lines, i + 1)
+                    block_id = self._block_id('after', delay_str, body)
+                    self.timer_blocks[block_id] = {'kind': 'after', 'commands': body}
+                    commands.append({
+                        'type': 'after',
+                        'delay': self._parse_duration(delay_str),
+                        'block': block_id,
+                    })
+                    continue
+                else:
+                    commands.append({'type': 'command', 'line': line})
+            
+            i += 1
+        
+        return commands, i + 1
+    
+    def _parse_options(self, tokens: List[str]) -> Dict[str, str]:
+        """Parse key=value options from a block header"""
+        options = {}
+        for token in tokens:
+            if '=' in token:
+                key, value = token.split('=', 1)
+                options[key] = value.strip('"\'')
+        return options
+    
+    def _label_python_blocks(self, commands: List[Dict], where: str) -> None:
+        """Record the owning handler in nested python commands for budget reports"""
+        for cmd in commands:
+            if cmd['type'] == 'python':
+                cmd['where'] = where
+            elif cmd['type'] in ('parallel', 'spawn'):
+                self._label_python_blocks(cmd['commands'], where)
+            elif cmd['type'] == 'after':
+                self._label_python_blocks(self.timer_blocks[cmd['block']]['commands'], where)
+    
+    def _parse_budget(self, options: Dict[str, str]) -> Dict[str, Any]:
+        """time=5s steps=1000000 memory=64MB -> ExecutionBudget arguments; 0 disables a limit"""
+        budget = {}
+        if 'time' in options:
+            budget['time'] = self._parse_duration(options['time'])
+        if 'steps' in options:
+            budget['steps'] = int(options['steps'])
+        if 'memory' in options:
+            budget['memory'] = self._parse_size(options['memory'])
+        return budget
+    
+    def _parse_size(self, value: str) -> int:
+        """Parse size like 512KB, 64MB, 1GB into bytes"""
+        match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*(b|kb|mb|gb)?', value.strip().lower())
+        if not match:
+            raise ValueError(f"Invalid size: {value}")
+        units = {'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3}
+        return int(float(match.group(1)) * units[match.group(2) or 'b'])
+    
+    def _parse_duration(self, value: str) -> float:
+        """Parse duration like 500ms, 30s, 10m, 2h, 1d into seconds"""
+        match = re.fullmatch(r'(\d+(?:\.\d+)?)(ms|s|m|h|d)?', value.strip())
+        if not match:
+            raise ValueError(f"Invalid duration: {value}")
+        units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+        return float(match.group(1)) * units.get(match.group(2) or 's')
+    
+    def _block_id(self, kind: str, arg: str, commands: List[Dict]) -> str:
+        """Stable block id, same across restarts while the block is unchanged"""
+        def content(value: Any) -> Any:
+            # Script position ('line_no', 'where') is not part of the block
+            if isinstance(value, dict):
+                return {key: content(item) for key, item in value.items() if key not in ('line_no', 'where')}
+            if isinstance(value, list):
+                return [content(item) for item in value]
+            return value
+        
+        source = f"{kind} {arg} {json.dumps(content(commands), sort_keys=True)}"
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+    
+    def _register_timer(self, timer_data: Dict) -> None:
+        """Register every/at block"""
+        try:
+            kind = timer_data['type']
+            arg = timer_data['arg'].strip('"\'')
+            timer = {
+                'kind': kind,
+                'commands': timer_data['commands'],
+                'chat_id': int(timer_data['options'].get('chat', 0)),
+            }
+            
+            if kind == 'every':
+                timer['interval'] = self._parse_duration(arg)
+                if timer['interval'] <= 0:
+                    raise ValueError(f"Invalid interval: {arg}")
+            else:
+                hour, minute = arg.split(':')
+                timer['at'] = (int(hour), int(minute))
+                datetime.time(*timer['at'])
+            
+            self.timer_blocks[self._block_id(kind, arg, timer['commands'])] = timer
+            print(self.t('timer_created', kind, arg))
+            
+        except Exception as e:
+            print(self.t('error_parsing_timer', e))
+    
     def _parse_button(self, line: str) -> Optional[Dict[str, Any]]:
         """FIXED button parsing"""
         try:
@@ -488,10 +1920,7 @@ class FinalESYBOTInterpreter:
                     builder.button(text=btn['text'], url=btn['url'])
                     self.debug_print(self.t('button_created', 'URL', btn['text'], btn['url']))
                 else:
-                    callback_data = btn['data']
-                    # Limit callback_data to 64 bytes
-                    if len(callback_data.encode('utf-8')) > 64:
-                        callback_data = callback_data[:60] + str(hash(callback_data) % 1000)
+                    callback_data = self._callback_data(btn['data'])
                     
                     builder.button(text=btn['text'], callback_data=callback_data)
                     self.debug_print(self.t('button_created', 'Callback', btn['text'], callback_data))
@@ -504,6 +1933,139 @@ class FinalESYBOTInterpreter:
         
         return builder.as_markup()
     
+    def _callback_data(self, data: str) -> str:
+        """Fit callback_data into Telegram's 64 bytes"""
+        if len(data.encode('utf-8')) > 64 or data.startswith(PayloadStore.PREFIX):
+            return self.payloads.put(data)
+        return data
+    
+    def _is_dynamic_keyboard(self, keyboard_data: Dict) -> bool:
+        """Keyboard needs per-update rendering"""
+        for btn in keyboard_data['buttons']:
+            if 'for' in btn or '$' in btn['text'] or '$' in btn.get('data', '') or '$' in btn.get('url', ''):
+                return True
+        return False
+    
+    def _keyboard_deps(self, buttons: List[Dict]) -> set:
+        """Names of $variables a keyboard template reads"""
+        deps = set()
+        for btn in buttons:
+            if 'for' in btn:
+                deps.add(btn['source'])
+                deps |= self._keyboard_deps(btn['buttons']) - {btn['for']}
+            else:
+                for value in (btn['text'], btn.get('data', ''), btn.get('url', '')):
+                    deps.update(re.findall(r'\$(\w+)', value))
+        return deps
+    
+    def _render_template(self, text: str, context: Dict[str, Any], scope: Dict[str, Any]) -> str:
+        """Replace loop variables ($item, $item.field), then regular variables"""
+        for name, value in scope.items():
+            def field(match, value=value):
+                if match.group(1) is None:
+                    return str(value)
+                if isinstance(value, dict):
+                    return str(value.get(match.group(1), ''))
+                return str(getattr(value, match.group(1), ''))
+            text = re.sub(r'\$' + name + r'(?:\.(\w+))?(?!\w)', field, text)
+        return self._replace_variables(text, context)
+    
+    def _expand_buttons(self, buttons: List[Dict], context: Dict[str, Any], scope: Dict[str, Any]) -> List[Dict]:
+        """Expand for-generators and templates into concrete buttons"""
+        result = []
+        for btn in buttons:
+            if 'for' in btn:
+                source = scope.get(btn['source'], self.variables.get(btn['source']))
+                for item in source or []:
+                    result.extend(self._expand_buttons(btn['buttons'], context, {**scope, btn['for']: item}))
+                continue
+            
+            rendered = dict(btn)
+            for key in ('text', 'data', 'url'):
+                if key in rendered:
+                    rendered[key] = self._render_template(rendered[key], context, scope)
+            result.append(rendered)
+        return result
+    
+    def _get_keyboard(self, name: str, context: Dict[str, Any]) -> Any:
+        """Keyboard markup by name; templated keyboards are memoized by variable versions"""
+        if name in self.keyboards:
+            return self.keyboards[name]
+        if name in self.paged_menus:
+            return self._render_page(name, 0, context)
+        
+        keyboard_data = self.dynamic_keyboards.get(name)
+        if keyboard_data is None:
+            return None
+        
+        if 'deps' not in keyboard_data:
+            keyboard_data['deps'] = sorted(self._keyboard_deps(keyboard_data['buttons']))
+        key = (name,) + tuple(
+            ('v', self.variables.version(dep)) if dep in self.variables else ('c', context.get(dep))
+            for dep in keyboard_data['deps']
+        )
+        markup = self.keyboard_cache.get(key)
+        if markup is None:
+            rendered = {'name': name, 'buttons': self._expand_buttons(keyboard_data['buttons'], context, {})}
+            if keyboard_data['type'] == 'inline':
+                markup = self._create_inline_keyboard(rendered)
+            else:
+                markup = self._create_reply_keyboard(rendered)
+            self.keyboard_cache.set(key, markup)
+        return markup
+    
+    def _render_page(self, name: str, page: int, context: Dict[str, Any]) -> InlineKeyboardMarkup:
+        """Build one page of a paged_menu; only that page's items are touched"""
+        menu = self.paged_menus[name]
+        items = self.variables.get(menu['source']) or []
+        pages = max(1, math.ceil(len(items) / menu['per_page']))
+        page = min(max(page, 0), pages - 1)
+        
+        if 'deps' not in menu:
+            menu['deps'] = sorted(self._keyboard_deps(menu['buttons']) - {menu['var']} | {menu['source']})
+        key = ('page', name, page) + tuple(
+            ('v', self.variables.version(dep)) if dep in self.variables else ('c', context.get(dep))
+            for dep in menu['deps']
+        )
+        markup = self.keyboard_cache.get(key)
+        if markup is not None:
+            return markup
+        
+        builder = InlineKeyboardBuilder()
+        start = page * menu['per_page']
+        for item in items[start:start + menu['per_page']]:
+            for btn in self._expand_buttons(menu['buttons'], context, {menu['var']: item}):
+                if 'url' in btn:
+                    builder.row(InlineKeyboardButton(text=btn['text'], url=btn['url']))
+                else:
+                    builder.row(InlineKeyboardButton(text=btn['text'], callback_data=self._callback_data(btn['data'])))
+        
+        if pages > 1:
+            nav = []
+            if page > 0:
+                nav.append(InlineKeyboardButton(text="◀️", callback_data=f"{self.PAGE_PREFIX}{name}:{page - 1}"))
+            nav.append(InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data=f"{self.PAGE_PREFIX}{name}:{page}"))
+            if page < pages - 1:
+                nav.append(InlineKeyboardButton(text="▶️", callback_data=f"{self.PAGE_PREFIX}{name}:{page + 1}"))
+            builder.row(*nav)
+        
+        markup = builder.as_markup()
+        self.keyboard_cache.set(key, markup)
+        return markup
+    
+    async def _handle_page_callback(self, callback: CallbackQuery) -> None:
+        """Switch paged_menu page in place"""
+        try:
+            name, page = callback.data[len(self.PAGE_PREFIX):].rsplit(':', 1)
+            if name in self.paged_menus and callback.message:
+                markup = self._render_page(name, int(page), self._build_context(callback))
+                if callback.message.reply_markup != markup:
+                    await callback.message.edit_reply_markup(reply_markup=markup)
+                    self.last_edits.pop((callback.message.chat.id, callback.message.message_id))
+            await callback.answer()
+        except Exception as e:
+            print(self.t('handler_error', 'paged_menu', e))
+    
     def _create_reply_keyboard(self, keyboard_data: Dict) -> ReplyKeyboardMarkup:
         """Wiki-compatible reply keyboard creation"""
         builder = ReplyKeyboardBuilder()
@@ -517,39 +2079,141 @@ class FinalESYBOTInterpreter:
     
     async def _execute_commands(self, commands: List[Dict], context: Dict[str, Any]) -> None:
         """Wiki-compatible command execution"""
+        # answer_callback without $variables does not depend on other
+        # commands, so it is sent concurrently with the rest of the handler
+        pending = []
         for cmd in commands:
             try:
-                if cmd['type'] == 'python':
-                    await self._execute_python_code(cmd['code'], context)
+                if cmd['type'] == 'command' and cmd['line'].startswith('answer_callback ') and '$' not in cmd['line']:
+                    pending.append(asyncio.create_task(self._execute_esybot_command(cmd['line'], context)))
+                elif cmd['type'] == 'parallel':
+                    await asyncio.gather(*(self._execute_commands([sub], context) for sub in cmd['commands']))
+                elif cmd['type'] == 'python' and 'cache' in cmd:
+                    await self._execute_cached_python(cmd, context)
+                elif cmd['type'] == 'python':
+                    await self._execute_python_code(cmd['code'], context, block=cmd)
                 elif cmd['type'] == 'command':
                     await self._execute_esybot_command(cmd['line'], context)
+                elif cmd['type'] == 'after':
+                    self._schedule_after(cmd, context)
+                elif cmd['type'] == 'spawn':
+                    self.task_pool.spawn(self._execute_commands(cmd['commands'], context), name='spawn')
             except Exception as e:
                 print(f"❌ Command execution error: {e}")
+        
+        if pending:
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, Exception):
+                    print(f"❌ Command execution error: {result}")
     
-    async def _execute_python_code(self, code: str, context: Dict[str, Any]) -> None:
-        """FIXED Python code execution with ESYBOT functions"""
+    def _log_task_error(self, name: str, error: Exception) -> None:
+        """Background task failure"""
+        print(self.t('task_error', name, error))
+        if self.debug:
+            import traceback
+            traceback.print_exception(type(error), error, error.__traceback__)
+    
+    async def _execute_cached_python(self, cmd: Dict, context: Dict[str, Any]) -> None:
+        """Run memoized Python block or replay its recorded outputs"""
+        key = (cmd['id'], self._replace_variables(cmd['key'], context))
+        stats = self.python_cache_stats.setdefault(cmd['id'], {'hits': 0, 'misses': 0})
+        
+        outputs = self.python_cache.get(key)
+        if outputs is not None:
+            stats['hits'] += 1
+            self.debug_print(self.t('python_cache_hit', key[1], stats['hits'], stats['misses']))
+            for output in outputs:
+                if output[0] == 'set':
+                    self.variables[output[1]] = output[2]
+                elif output[0] == 'send':
+                    await self._python_send(context, *output[1:])
+                elif output[0] == 'media':
+                    await self._python_send_media(context, *output[1:])
+            return
+        
+        stats['misses'] += 1
+        self.debug_print(self.t('python_cache_miss', key[1], stats['hits'], stats['misses']))
+        outputs = []
+        if await self._execute_python_code(cmd['code'], context, outputs, cmd):
+            self.python_cache.set(key, outputs, ttl=cmd['cache'])
+    
+    def python_cache_info(self) -> Dict[str, Any]:
+        """Hit/miss counters of memoized Python blocks"""
+        return {
+            'hits': sum(stats['hits'] for stats in self.python_cache_stats.values()),
+            'misses': sum(stats['misses'] for stats in self.python_cache_stats.values()),
+            'size': len(self.python_cache),
+            'blocks': {block_id: dict(stats) for block_id, stats in self.python_cache_stats.items()},
+        }
+    
+    async def _python_send(self, context: Dict[str, Any], text: str, chat_id: int = None,
+                           keyboard: str = None, parse_mode: str = None) -> None:
+        """esybot_send implementation"""
+        reply_markup = None
+        if keyboard:
+            reply_markup = self._get_keyboard(keyboard, context)
+        
+        await self.bot.send_message(
+            chat_id=chat_id or context.get('chat_id'),
+            text=text,
+            reply_markup=reply_markup,
+            parse_mode=parse_mode
+        )
+    
+    async def _python_send_media(self, context: Dict[str, Any], kind: str, path: str, caption: str = None,
+                                 chat_id: int = None, keyboard: str = None, parse_mode: str = None) -> None:
+        """esybot_send_photo / _document / _audio implementation"""
+        await self._send_media(
+            kind, chat_id or context.get('chat_id'), path,
+            caption=caption,
+            reply_markup=self._get_keyboard(keyboard, context) if keyboard else None,
+            parse_mode=parse_mode
+        )
+    
+    async def _execute_python_code(self, code: str, context: Dict[str, Any],
+                                   outputs: Optional[List[Tuple]] = None, block: Optional[Dict] = None) -> bool:
+        """FIXED Python code execution with ESYBOT functions
+        
+        When `outputs` is given, variable writes and sends are recorded
+        into it so a memoized block can replay them. `block` is the parsed
+        python command; its budget overrides python_budget.
+        """
         try:
-            # Normalize Python code indentation
-            normalized_code = self._normalize_python_code(code)
-            
-            if not normalized_code.strip():
+            compiled = self._compile_python(code)
+            if compiled is None:
                 self.debug_print(self.t('python_block_empty'))
-                return
+                return False
+            compiled, names, line_count = compiled
             
-            line_count = len(normalized_code.split('\n'))
             self.debug_print(self.t('python_executing', line_count))
             
+            # Variables this block writes, in order; only these are recorded
+            # into `outputs`, not writes other handlers make during its awaits
+            written: Dict[str, None] = {}
+            
+            # Containers the block can mutate in place, with a snapshot taken
+            # before it could; afterwards only those that differ count as written
+            snapshots: Dict[str, Tuple[Any, Optional[bytes]]] = {}
+            
+            def snapshot(var_name: str) -> None:
+                value = self.variables.get(var_name)
+                if var_name not in snapshots and isinstance(value, (list, dict, set)):
+                    snapshots[var_name] = (value, self._container_snapshot(value))
+            
             # KEY FIX: Add ESYBOT functions
             def esybot_set(var_name: str, value: Any) -> None:
                 """Set ESYBOT variable"""
                 self.variables[var_name] = value
+                written[var_name] = None
                 
             def esybot_get(var_name: str, default: Any = None) -> Any:
                 """Get ESYBOT variable"""
+                snapshot(var_name)
                 return self.variables.get(var_name, default)
                 
             def esybot_increment(var_name: str, amount: int = 1) -> None:
                 """Increment ESYBOT variable"""
+                written[var_name] = None
                 if var_name in self.variables:
                     try:
                         self.variables[var_name] += amount
@@ -560,6 +2224,7 @@ class FinalESYBOTInterpreter:
                     
             def esybot_decrement(var_name: str, amount: int = 1) -> None:
                 """Decrement ESYBOT variable"""
+                written[var_name] = None
                 if var_name in self.variables:
                     try:
                         self.variables[var_name] -= amount
@@ -570,23 +2235,48 @@ class FinalESYBOTInterpreter:
             
             async def esybot_send(text: str, chat_id: int = None, keyboard: str = None, parse_mode: str = None) -> None:
                 """Send message from Python block"""
-                target_chat = chat_id or context.get('chat_id')
-                reply_markup = None
-                
-                if keyboard and keyboard in self.keyboards:
-                    reply_markup = self.keyboards[keyboard]
-                    
-                await self.bot.send_message(
-                    chat_id=target_chat,
-                    text=text,
-                    reply_markup=reply_markup,
-                    parse_mode=parse_mode
-                )
+                if outputs is not None:
+                    outputs.append(('send', text, chat_id, keyboard, parse_mode))
+                await self._python_send(context, text, chat_id, keyboard, parse_mode)
+            
+            def esybot_result(title: str, text: str = None, description: str = None, url: str = None,
+                              thumb: str = None, id: str = None, parse_mode: str = None) -> None:
+                """Add inline query result (on_inline handlers)"""
+                self._add_inline_result(context, title, text if text is not None else title,
+                                        description, url, thumb, id, parse_mode)
+            
+            async def esybot_fetch(url: str, timeout: float = 10.0, cache: float = 0.0, method: str = 'GET',
+                                   headers: Dict[str, str] = None, json: Any = None) -> Any:
+                """HTTP request through the shared pool; GET responses may be cached"""
+                return await self.fetch_client.fetch(url, timeout, cache, method, headers, json)
+            
+            def esybot_spawn(coro, then: Any = None) -> asyncio.Task:
+                """Run coroutine in background; `then` is a text with $result or a callback"""
+                async def on_done(result: Any) -> None:
+                    if isinstance(then, str):
+                        text = self._replace_variables(then.replace('$result', str(result)), context)
+                        await self._python_send(context, text)
+                    elif then is not None:
+                        done = then(result)
+                        if inspect.isawaitable(done):
+                            await done
+                return self.task_pool.spawn(coro, name='esybot_spawn', on_done=on_done)
+            
+            def media_sender(kind: str):
+                async def esybot_send_media(path: str, caption: str = None, chat_id: int = None,
+                                            keyboard: str = None, parse_mode: str = None) -> None:
+                    """Send file from Python block, uploaded once and reused by file_id"""
+                    if outputs is not None:
+                        outputs.append(('media', kind, path, caption, chat_id, keyboard, parse_mode))
+                    await self._python_send_media(context, kind, path, caption, chat_id, keyboard, parse_mode)
+                return esybot_send_media
             
             # Prepare full environment for Python code
             local_vars = {
-                **context,
+                # Only context fields the block reads
+                **{name: context[name] for name in names if name in context},
                 **self.variables,
+                **self.tables,
                 # Core modules
                 'bot': self.bot,
                 'random': random,
@@ -602,39 +2292,80 @@ class FinalESYBOTInterpreter:
                 'esybot_increment': esybot_increment,
                 'esybot_decrement': esybot_decrement,
                 'esybot_send': esybot_send,
+                'esybot_send_photo': media_sender('photo'),
+                'esybot_send_document': media_sender('document'),
+                'esybot_send_audio': media_sender('audio'),
+                'esybot_cache_stats': self.python_cache_info,
+                'esybot_spawn': esybot_spawn,
+                'esybot_fetch': esybot_fetch,
+                'esybot_result': esybot_result,
                 # Synonyms for convenience
                 'set_var': esybot_set,
                 'get_var': esybot_get,
             }
             
-            # Execute normalized Python code
-            exec(normalized_code, {'__builtins__': __builtins__}, local_vars)
-            
-            # Update ESYBOT variables (in case of direct changes)
+            injected = dict(self.variables)
+            for var_name in names:
+                snapshot(var_name)
+            
+            # Execute normalized Python code; top-level await is allowed.
+            # One namespace, so functions defined in the block see its names
+            local_vars['__builtins__'] = __builtins__
+            budget = ExecutionBudget(**{**self.python_budget, **(block or {}).get('budget', {})})
+            budget.start()
+            result = budget.call(eval, compiled, local_vars)
+            if inspect.iscoroutine(result):
+                await budget.wait(result)
+            if budget.memory and budget.peak > budget.memory:
+                raise BudgetExceeded('memory', budget.memory, budget.line)
+            
+            # Update ESYBOT variables the block assigned directly; compared with
+            # the values it started with, so concurrent writes are not undone
             updated_vars = []
-            for var_name in list(self.variables.keys()):
-                if var_name in local_vars and local_vars[var_name] != self.variables[var_name]:
+            for var_name, value in injected.items():
+                if var_name in local_vars and local_vars[var_name] is not value and local_vars[var_name] != value:
                     self.variables[var_name] = local_vars[var_name]
+                    written[var_name] = None
                     updated_vars.append(f"{var_name}={local_vars[var_name]}")
             
             # Add new variables
             excluded_vars = {
                 'bot', 'random', 'datetime', 'json', 'os', 're', 'math', 'time', '__builtins__',
                 'esybot_set', 'esybot_get', 'esybot_increment', 'esybot_decrement', 'esybot_send',
+                'esybot_send_photo', 'esybot_send_document', 'esybot_send_audio', 'esybot_cache_stats',
+                'esybot_spawn', 'esybot_fetch', 'esybot_result',
                 'set_var', 'get_var'
             }
             new_vars = []
             for key, value in local_vars.items():
-                if key not in context and key not in excluded_vars and key not in self.variables:
+                if key not in context and key not in excluded_vars and key not in self.variables and key not in self.tables:
                     self.variables[key] = value
+                    written[key] = None
                     new_vars.append(f"{key}={value}")
             
+            # Containers the block changed in place (cart.append(x) or
+            # esybot_get('cart').append(x)); reading one changes nothing
+            for var_name, (value, before) in snapshots.items():
+                if var_name in written or self.variables.get(var_name) is not value:
+                    continue
+                if before is None or self._container_snapshot(value) != before:
+                    self.variables.touch(var_name)
+                    written[var_name] = None
+            
+            if outputs is not None:
+                for var_name in written:
+                    if var_name in self.variables:
+                        outputs.append(('set', var_name, self.variables[var_name]))
+            
             self.debug_print(self.t('python_success'))
             if updated_vars:
                 self.debug_print(self.t('python_updated_vars', ', '.join(updated_vars)))
             if new_vars:
                 self.debug_print(self.t('python_new_vars', ', '.join(new_vars)))
+            return True
             
+        except BudgetExceeded as e:
+            self._report_budget(e, code, block or {})
         except NameError as e:
             print(self.t('python_name_error', e))
             print(self.t('python_functions'))
@@ -643,6 +2374,9 @@ class FinalESYBOTInterpreter:
             print(self.t('function_inc'))
             print(self.t('function_dec'))
             print(self.t('function_send'))
+            print(self.t('function_media'))
+            print(self.t('function_spawn'))
+            print(self.t('function_fetch'))
             if self.debug:
                 print(self.t('problem_code'))
                 for i, line in enumerate(code.split('\n'), 1):
@@ -663,7 +2397,57 @@ class FinalESYBOTInterpreter:
                     print(self.t('line_num', i, repr(line)))
                 import traceback
                 traceback.print_exc()
+        return False
 
+    @staticmethod
+    def _container_snapshot(value: Any) -> Optional[bytes]:
+        """Pickled copy of a list/dict/set to compare after a block; None if it can't be pickled"""
+        try:
+            return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return None
+    
+    def _report_budget(self, error: BudgetExceeded, code: str, block: Dict) -> None:
+        """Log which handler and line of a Python block went over budget"""
+        if error.kind == 'time':
+            limit = f"{error.limit:g}s"
+        elif error.kind == 'memory':
+            limit = f"{error.limit / 1048576:g}MB"
+        else:
+            limit = str(error.limit)
+        
+        lines = self._normalize_python_code(code).split('\n')
+        text = lines[error.line - 1].strip() if 0 < error.line <= len(lines) else ''
+        where = block.get('where', 'python')
+        if 'line_no' in block and error.line:
+            where = f"{where} ({self.script_path or 'script'}:{block['line_no'] + error.line - 1})"
+        print(self.t('python_budget_exceeded', error.kind, limit, where, error.line, text))
+    
+    def _compile_python(self, code: str) -> Optional[Tuple[Any, frozenset, int]]:
+        """Normalize and compile Python block once; returns (code, names, lines)"""
+        cached = self._compiled_python.get(code)
+        if cached is not None:
+            return cached
+        
+        # Normalize Python code indentation
+        normalized_code = self._normalize_python_code(code)
+        if not normalized_code.strip():
+            return None
+        
+        compiled = compile(normalized_code, ExecutionBudget.FILENAME, 'exec', flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+        
+        # Names read anywhere in the block, including nested functions
+        names = set()
+        stack = [compiled]
+        while stack:
+            code_obj = stack.pop()
+            names.update(code_obj.co_names)
+            stack.extend(const for const in code_obj.co_consts if inspect.iscode(const))
+        
+        cached = (compiled, frozenset(names), len(normalized_code.split('\n')))
+        self._compiled_python[code] = cached
+        return cached
+    
     def _normalize_python_code(self, code: str) -> str:
         """Normalize Python code indentation for exec()"""
         try:
@@ -719,6 +2503,12 @@ class FinalESYBOTInterpreter:
             await self._execute_reply_command(line, context)
         elif line.startswith('edit '):
             await self._execute_edit_command(line, context)
+        elif line.startswith('fetch '):
+            await self._execute_fetch_command(line, context)
+        elif line.startswith('result '):
+            self._execute_result_command(line, context)
+        elif line.startswith(('send_photo ', 'send_document ', 'send_audio ')):
+            await self._execute_media_command(line, context)
         elif line.startswith('answer_callback '):
             await self._execute_answer_callback_command(line, context)
         elif line.startswith('increment '):
@@ -745,8 +2535,8 @@ class FinalESYBOTInterpreter:
                 keyboard_match = re.search(r'keyboard=(\w+)', line)
                 if keyboard_match:
                     kb_name = keyboard_match.group(1)
-                    if kb_name in self.keyboards:
-                        reply_markup = self.keyboards[kb_name]
+                    reply_markup = self._get_keyboard(kb_name, context)
+                    if reply_markup is not None:
                         self.debug_print(self.t('keyboard_used', kb_name))
             
             if 'parse_mode=' in line:
@@ -766,6 +2556,162 @@ class FinalESYBOTInterpreter:
         except Exception as e:
             print(self.t('error_send_command', e))
     
+    def _execute_result_command(self, line: str, context: Dict[str, Any]) -> None:
+        """result "Title" "Message text" description="..." url="..." thumb="..." id="..." (on_inline)"""
+        try:
+            options = {key: self._replace_variables(value, context)
+                       for key, value in re.findall(r'(\w+)="([^"]*)"', line)}
+            quotes = re.findall(r'"([^"]*)"', re.sub(r'\w+="[^"]*"', '', line))
+            if not quotes:
+                return
+            
+            title = self._replace_variables(quotes[0], context)
+            text = self._replace_variables(quotes[1], context) if len(quotes) > 1 else title
+            self._add_inline_result(context, title, text, **options)
+            
+        except Exception as e:
+            print(self.t('error_result_command', e))
+    
+    def _add_inline_result(self, context: Dict[str, Any], title: str, text: str, description: str = None,
+                           url: str = None, thumb: str = None, id: str = None, parse_mode: str = None) -> None:
+        """Collect inline result of the running on_inline handler"""
+        results = context.get('inline_results')
+        if results is None:
+            return
+        results.append({
+            'id': id,
+            'title': str(title),
+            'text': str(text),
+            'description': description,
+            'url': url,
+            'thumb': thumb,
+            'parse_mode': parse_mode,
+        })
+    
+    async def _execute_fetch_command(self, line: str, context: Dict[str, Any]) -> None:
+        """fetch "url" -> var timeout=2s cache=30s"""
+        var_name = None
+        try:
+            match = re.match(r'fetch\s+"([^"]*)"\s*->\s*(\w+)(.*)', line)
+            if not match:
+                return
+            
+            url = self._replace_variables(match.group(1), context)
+            var_name = match.group(2)
+            options = self._parse_options(match.group(3).split())
+            
+            self.variables[var_name] = await self.fetch_client.fetch(
+                url,
+                timeout=self._parse_duration(options.get('timeout', '10s')),
+                cache=self._parse_duration(options.get('cache', '0s'))
+            )
+            self.debug_print(self.t('fetch_done', url, var_name))
+            
+        except Exception as e:
+            print(self.t('error_fetch_command', e))
+            if var_name:
+                self.variables[var_name] = None
+    
+    async def _execute_media_command(self, line: str, context: Dict[str, Any]) -> None:
+        """send_photo / send_document / send_audio command execution"""
+        command = line.split(' ', 1)[0]
+        try:
+            match = re.search(r'"([^"]*)"', line)
+            if not match:
+                return
+            
+            path = self._replace_variables(match.group(1), context)
+            
+            caption = None
+            caption_match = re.search(r'caption="([^"]*)"', line)
+            if caption_match:
+                caption = self._replace_variables(caption_match.group(1), context)
+            
+            reply_markup = None
+            keyboard_match = re.search(r'keyboard=(\w+)', line)
+            if keyboard_match:
+                reply_markup = self._get_keyboard(keyboard_match.group(1), context)
+            
+            parse_mode = None
+            parse_mode_match = re.search(r'parse_mode="([^"]*)"', line)
+            if parse_mode_match:
+                parse_mode = parse_mode_match.group(1)
+            
+            await self._send_media(command[5:], context['chat_id'], path, caption, reply_markup, parse_mode)
+            
+        except Exception as e:
+            print(self.t('error_media_command', command, e))
+    
+    async def _send_media(self, kind: str, chat_id: int, path: str, caption: str = None,
+                          reply_markup: Any = None, parse_mode: str = None) -> Message:
+        """Send local file by cached file_id, or stream it from disk once"""
+        method = getattr(self.bot, f'send_{kind}')
+        
+        local_path = self._script_relative(path)
+        if not os.path.isfile(local_path):
+            # Not a local file: URL or file_id, Telegram resolves it
+            return await method(chat_id, path, caption=caption, reply_markup=reply_markup, parse_mode=parse_mode)
+        
+        key = os.path.abspath(local_path)
+        stat = os.stat(key)
+        entry = self.file_ids.get(key)
+        if not entry or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+            entry = {'mtime': stat.st_mtime, 'size': stat.st_size, 'file_id': {}}
+            self.file_ids[key] = entry
+        
+        # Telegram may have stored an audio upload as voice/document
+        for sent_kind in (kind, 'voice', 'document') if kind == 'audio' else (kind,):
+            file_id = entry['file_id'].get(sent_kind)
+            if not file_id:
+                continue
+            try:
+                message = await getattr(self.bot, f'send_{sent_kind}')(
+                    chat_id, file_id, caption=caption, reply_markup=reply_markup, parse_mode=parse_mode
+                )
+                self.debug_print(self.t('media_cached', sent_kind, path))
+                return message
+            except Exception as e:
+                # Stale file_id (e.g. another bot token), upload again
+                self.debug_print(self.t('error_file_ids', e))
+                del entry['file_id'][sent_kind]
+        
+        # FSInputFile streams the file from disk in chunks
+        message = await method(chat_id, FSInputFile(key), caption=caption, reply_markup=reply_markup, parse_mode=parse_mode)
+        sent_kind = kind
+        sent = getattr(message, kind, None)
+        if isinstance(sent, list):
+            # Photos come back as a list of sizes, the largest is last
+            sent = sent[-1] if sent else None
+        if sent is None:
+            # Telegram may store the file as voice/document instead
+            sent_kind = 'voice' if message.voice else 'document'
+            sent = getattr(message, sent_kind)
+        if sent is not None:
+            entry['file_id'][sent_kind] = sent.file_id
+            self._save_file_ids()
+        self.debug_print(self.t('media_uploaded', kind, path))
+        return message
+    
+    def _load_file_ids(self) -> None:
+        """Load persistent file_id cache"""
+        path = self._state_path('file_ids')
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.file_ids = json.load(f)
+            except Exception as e:
+                print(self.t('error_file_ids', e))
+    
+    def _save_file_ids(self) -> None:
+        """Persist file_id cache next to the script"""
+        try:
+            path = self._state_path('file_ids')
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.file_ids, f)
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            print(self.t('error_file_ids', e))
+    
     async def _execute_reply_command(self, line: str, context: Dict[str, Any]) -> None:
         """Reply command execution"""
         try:
@@ -805,22 +2751,83 @@ class FinalESYBOTInterpreter:
             if 'keyboard=' in line:
                 keyboard_match = re.search(r'keyboard=(\w+)', line)
                 if keyboard_match:
-                    kb_name = keyboard_match.group(1)
-                    if kb_name in self.keyboards:
-                        reply_markup = self.keyboards[kb_name]
+                    reply_markup = self._get_keyboard(keyboard_match.group(1), context)
             
             update = context.get('update')
             if update and isinstance(update, CallbackQuery):
-                await update.message.edit_text(
-                    text=text, 
-                    parse_mode=parse_mode,
-                    reply_markup=reply_markup
-                )
-                self.debug_print(self.t('send_command', text[:50]))
+                coalesce_match = re.search(r'coalesce=(\S+)', line)
+                if coalesce_match:
+                    self._coalesce_edit(update.message, text, parse_mode, reply_markup,
+                                        self._parse_duration(coalesce_match.group(1)))
+                else:
+                    await self._apply_edit(update.message, text, parse_mode, reply_markup)
             
         except Exception as e:
             print(self.t('error_edit_command', e))
     
+    async def _apply_edit(self, message: Message, text: str, parse_mode: Optional[str], reply_markup: Any) -> None:
+        """Edit message unless it already shows this state"""
+        # Telegram rejects edits that change nothing
+        key = (message.chat.id, message.message_id)
+        state = (text, parse_mode, reply_markup)
+        # The cached state only applies to the snapshot we last edited;
+        # a newer snapshot of the message shows its real current state
+        last_message, last = self.last_edits.get(key, (None, None))
+        if last_message is not message:
+            last = (message.text, None, message.reply_markup) if parse_mode is None else None
+        if last == state:
+            self.debug_print(self.t('edit_skipped'))
+            return
+        
+        await message.edit_text(
+            text=text, 
+            parse_mode=parse_mode,
+            reply_markup=reply_markup
+        )
+        self.last_edits.set(key, (message, state))
+        self.debug_print(self.t('send_command', text[:50]))
+    
+    def _coalesce_edit(self, message: Message, text: str, parse_mode: Optional[str],
+                       reply_markup: Any, window: float) -> None:
+        """Queue edit; only the latest state per message is sent once per window"""
+        key = (message.chat.id, message.message_id)
+        if key in self.pending_edits:
+            self.debug_print(self.t('edit_coalesced'))
+        self.pending_edits[key] = (message, text, parse_mode, reply_markup)
+        if key not in self.edit_flush_tasks:
+            self.edit_flush_tasks[key] = asyncio.create_task(self._flush_edits(key, window))
+    
+    async def _flush_edits(self, key: Tuple[int, int], window: float) -> None:
+        """Send pending edits of one message, at most one per window"""
+        try:
+            while key in self.pending_edits:
+                sent_at = self.edit_sent_at.get(key)
+                if sent_at is not None:
+                    await asyncio.sleep(max(0.0, sent_at + window - time.monotonic()))
+                
+                message, text, parse_mode, reply_markup = self.pending_edits.pop(key)
+                self.edit_sent_at.set(key, time.monotonic(), ttl=window)
+                try:
+                    await self._apply_edit(message, text, parse_mode, reply_markup)
+                except Exception as e:
+                    print(self.t('error_edit_command', e))
+        finally:
+            self.edit_flush_tasks.pop(key, None)
+    
+    async def _drain_edits(self) -> None:
+        """Stop flush tasks and send the latest pending edit of every message now"""
+        tasks = list(self.edit_flush_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        pending, self.pending_edits = self.pending_edits, {}
+        for message, text, parse_mode, reply_markup in pending.values():
+            try:
+                await self._apply_edit(message, text, parse_mode, reply_markup)
+            except Exception as e:
+                print(self.t('error_edit_command', e))
+    
     async def _execute_answer_callback_command(self, line: str, context: Dict[str, Any]) -> None:
         """FIXED answer_callback command execution"""
         try:
@@ -887,60 +2894,233 @@ class FinalESYBOTInterpreter:
     
     def _replace_variables(self, text: str, context: Dict[str, Any]) -> str:
         """Wiki-compatible variable replacement"""
+        # Table lookups: $table[key].column
+        if self.tables and '[' in text:
+            text = re.sub(r'\$(\w+)\[([^\]]*)\](?:\.(\w+))?', lambda m: self._table_lookup(m, context), text)
+        
         # Replace ESYBOT variables
         for var_name, var_value in self.variables.items():
             text = text.replace(f'${var_name}', str(var_value))
         
-        # Replace system variables
-        text = text.replace('$user_id', str(context.get('user_id', 0)))
-        text = text.replace('$chat_id', str(context.get('chat_id', 0)))
-        text = text.replace('$first_name', str(context.get('first_name', '')))
-        text = text.replace('$username', str(context.get('username', '')))
-        text = text.replace('$text', str(context.get('text', '')))
-        text = text.replace('$data', str(context.get('data', '')))
+        # Replace system variables (only those used, context is lazy)
+        if '$' in text:
+            for name, default in (('user_id', 0), ('chat_id', 0), ('first_name', ''),
+                                  ('username', ''), ('text', ''), ('data', '')):
+                if f'${name}' in text:
+                    text = text.replace(f'${name}', str(context.get(name, default)))
         
         return text
     
+    def _state_path(self, name: str) -> str:
+        """Path of a state file stored next to the script"""
+        return f"{os.path.splitext(self.script_path or 'esybot')[0]}.{name}.json"
+    
+    def _schedule_after(self, cmd: Dict, context: Dict[str, Any]) -> None:
+        """Schedule after-block for the current user"""
+        ctx_data = {
+            'user_id': context.get('user_id', 0),
+            'chat_id': context.get('chat_id', 0),
+            'first_name': context.get('first_name', ''),
+            'username': context.get('username', ''),
+            'text': context.get('text', ''),
+            'data': context.get('data', ''),
+        }
+        self.timer_wheel.add(time.time() + cmd['delay'], (cmd['block'], ctx_data))
+        self._timers_dirty = True
+    
+    def _next_timer_due(self, timer: Dict, now: float) -> float:
+        """Next fire time of every/at block"""
+        if timer['kind'] == 'every':
+            return now + timer['interval']
+        
+        today = datetime.datetime.fromtimestamp(now)
+        due = today.replace(hour=timer['at'][0], minute=timer['at'][1], second=0, microsecond=0)
+        if due.timestamp() <= now:
+            due += datetime.timedelta(days=1)
+        return due.timestamp()
+    
+    def _fire_timer(self, due: float, item: Tuple[str, Optional[Dict]]) -> None:
+        """Run fired timer through the command executor"""
+        block_id, ctx_data = item
+        timer = self.timer_blocks.get(block_id)
+        if not timer:
+            return
+        
+        now = time.time()
+        self.debug_print(self.t('timer_fired', timer['kind'], now - due))
+        
+        if ctx_data is None:
+            # Recurring timer: keep the schedule grid, skip missed runs
+            if timer['kind'] == 'every':
+                next_due = due + timer['interval']
+                if next_due <= now:
+                    next_due += (now - next_due) // timer['interval'] * timer['interval'] + timer['interval']
+            else:
+                next_due = self._next_timer_due(timer, now)
+            self.timer_wheel.add(next_due, (block_id, None))
+            ctx_data = {'chat_id': timer.get('chat_id', 0)}
+        self._timers_dirty = True
+        
+        context = self._build_context(None)
+        context.update(ctx_data)
+        
+        self.timer_pool.spawn(self._execute_commands(timer['commands'], context), name=timer['kind'])
+    
+    def _load_timers(self) -> None:
+        """Schedule every/at blocks and restore pending timers from disk"""
+        saved = []
+        path = self._state_path('timers')
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+            except Exception as e:
+                print(self.t('error_timers_file', e))
+        
+        now = time.time()
+        restored = set()
+        for entry in saved:
+            block_id = entry.get('block')
+            timer = self.timer_blocks.get(block_id)
+            if not timer:
+                continue
+            if entry.get('ctx') is None:
+                if timer['kind'] == 'after' or block_id in restored:
+                    continue
+                restored.add(block_id)
+            self.timer_wheel.add(entry['due'], (block_id, entry.get('ctx')))
+        
+        for block_id, timer in self.timer_blocks.items():
+            if timer['kind'] != 'after' and block_id not in restored:
+                self.timer_wheel.add(self._next_timer_due(timer, now), (block_id, None))
+        
+        print(self.t('timers_loaded', len(self.timer_wheel)))
+    
+    def _save_timers(self) -> None:
+        """Persist pending timers next to the script"""
+        try:
+            path = self._state_path('timers')
+            entries = [
+                {'block': item[0], 'due': due, 'ctx': item[1]}
+                for due, item in self.timer_wheel.items()
+            ]
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(path + '.tmp', path)
+            self._timers_dirty = False
+        except Exception as e:
+            print(self.t('error_timers_file', e))
+    
+    async def _run_timers(self) -> None:
+        """Advance timing wheel; timers fire at most one tick late"""
+        last_save = time.monotonic()
+        while True:
+            await asyncio.sleep(self.timer_wheel.tick)
+            for due, item in self.timer_wheel.advance(time.time()):
+                try:
+                    self._fire_timer(due, item)
+                except Exception as e:
+                    print(f"❌ Command execution error: {e}")
+            
+            if self._timers_dirty and time.monotonic() - last_save >= 60:
+                self._save_timers()
+                last_save = time.monotonic()
+    
+    def _build_context(self, update: Union[Message, CallbackQuery, None]) -> UpdateContext:
+        """Build command context from update"""
+        return UpdateContext(update)
+    
+    async def _throttle_middleware(self, handler, event: Union[Message, CallbackQuery], data: Dict[str, Any]) -> Any:
+        """Drop updates from users/chats over their token bucket"""
+        user = event.from_user
+        if isinstance(event, CallbackQuery):
+            chat_id = event.message.chat.id if event.message else None
+        elif isinstance(event, Message):
+            chat_id = event.chat.id
+        else:
+            chat_id = None
+        
+        for scope, key in (('user', user.id if user else None), ('chat', chat_id)):
+            limiter = self.throttles.get(scope)
+            if limiter is None or key is None or limiter.allow(key):
+                continue
+            
+            self.debug_print(self.t('update_throttled', scope, key))
+            if isinstance(event, CallbackQuery):
+                await event.answer()
+            
+            # on_throttled runs at most once per bucket refill window
+            if self.throttled_commands and (scope, key) not in self.throttle_notices:
+                self.throttle_notices.set((scope, key), True, ttl=limiter.burst / limiter.rate)
+                await self._execute_commands(self.throttled_commands, self._build_context(event))
+            return None
+        
+        return await handler(event, data)
+    
+    async def _payload_middleware(self, handler, event: CallbackQuery, data: Dict[str, Any]) -> Any:
+        """Resolve stored callback payload before routing"""
+        if event.data and event.data.startswith(PayloadStore.PREFIX):
+            payload = self.payloads.get(event.data)
+            if payload is None:
+                self.debug_print(self.t('payload_missing', event.data))
+            else:
+                event = event.model_copy(update={'data': payload})
+        return await handler(event, data)
+    
+    def _save_payloads(self) -> None:
+        """Persist callback payload table"""
+        try:
+            self.payloads.save()
+        except Exception as e:
+            print(self.t('error_payloads_file', e))
+    
+    async def _autosave_payloads(self) -> None:
+        """Save new payloads every save_interval, so a crash loses at most one interval"""
+        while True:
+            await asyncio.sleep(self.payloads.save_interval)
+            self._save_payloads()
+    
+    def _table_lookup(self, match: re.Match, context: Dict[str, Any]) -> str:
+        """Resolve $table[key].column in templates"""
+        table = self.tables.get(match.group(1))
+        if table is None:
+            return match.group(0)
+        
+        key = self._replace_variables(match.group(2).strip().strip('"\''), context)
+        row = table.get(key)
+        if row is None:
+            return ''
+        if match.group(3):
+            value = row.get(match.group(3))
+            return '' if value is None else str(value)
+        return str(row)
+    
     async def _create_handler(self, handler_data: Dict) -> None:
         """FIXED handler creation"""
         handler_type = handler_data['type']
         handler_arg = handler_data['arg']
         commands = handler_data['commands']
+        options = handler_data.get('options', {})
+        dedupe_window = self._parse_duration(options.get('dedupe', '0'))
         
         async def handler_func(update: Union[Message, CallbackQuery], state: FSMContext = None):
             try:
-                # Correct context definition
-                context = {
-                    'update': update,
-                    'user_id': 0,
-                    'first_name': '',
-                    'username': '',
-                    'text': '',
-                    'data': '',
-                    'chat_id': 0,
-                }
+                context = self._build_context(update)
                 
-                # Determine update type and extract data
                 if isinstance(update, CallbackQuery):
-                    context.update({
-                        'user_id': update.from_user.id,
-                        'first_name': update.from_user.first_name or '',
-                        'username': f"@{update.from_user.username}" if update.from_user.username else '',
-                        'chat_id': update.message.chat.id if update.message else update.from_user.id,
-                        'text': update.data or '',
-                        'data': update.data or '',
-                    })
                     print(self.t('callback_handler', handler_type, context['user_id'], context['data']))
                     
+                    # Double-tap suppression
+                    if dedupe_window > 0:
+                        message_key = update.message.message_id if update.message else update.inline_message_id
+                        dedupe_key = (context['user_id'], message_key, context['data'])
+                        if dedupe_key in self.recent_callbacks:
+                            self.debug_print(self.t('callback_duplicate', context['data']))
+                            await update.answer()
+                            return
+                        self.recent_callbacks.set(dedupe_key, True, ttl=dedupe_window)
+                    
                 elif isinstance(update, Message):
-                    context.update({
-                        'user_id': update.from_user.id if update.from_user else 0,
-                        'first_name': update.from_user.first_name or '' if update.from_user else '',
-                        'username': f"@{update.from_user.username}" if update.from_user and update.from_user.username else '',
-                        'chat_id': update.chat.id,
-                        'text': update.text or update.caption or '',
-                        'data': '',
-                    })
                     print(self.t('message_handler', handler_type, context['user_id'], context['text'][:50]))
                 
                 # EXECUTE COMMANDS
@@ -952,7 +3132,11 @@ class FinalESYBOTInterpreter:
                 traceback.print_exc()
         
         # Correct handler registration
-        if handler_type == 'on_start':
+        if handler_type == 'on_inline':
+            self._create_inline_handler(handler_data)
+        elif handler_type == 'on_throttled':
+            self.throttled_commands = commands
+        elif handler_type == 'on_start':
             self.dp.message.register(handler_func, Command(commands=["start"]))
         elif handler_type == 'on_message':
             if handler_arg == '*':
@@ -991,16 +3175,120 @@ class FinalESYBOTInterpreter:
         elif handler_type == 'on_location':
             self.dp.message.register(handler_func, F.location)
     
+    def _create_inline_handler(self, handler_data: Dict) -> None:
+        """on_inline [prefix] cache_time=300 personal=false per_page=20 prefix_reuse=false"""
+        handler_arg = handler_data['arg']
+        commands = handler_data['commands']
+        options = handler_data.get('options', {})
+        cache_time = int(self._parse_duration(options.get('cache_time', '300')))
+        is_personal = options.get('personal', 'false').lower() == 'true'
+        per_page = min(50, max(1, int(options.get('per_page', 20))))
+        prefix_reuse = options.get('prefix_reuse', 'false').lower() == 'true'
+        handler_id = self._block_id('on_inline', handler_arg, commands)
+        
+        async def inline_func(query: InlineQuery):
+            try:
+                context = self._build_context(query)
+                normalized = ' '.join(query.query.lower().split())
+                offset = int(query.offset) if query.offset.isdigit() else 0
+                print(self.t('inline_handler', context['user_id'], normalized[:50], offset))
+                
+                owner = context['user_id'] if is_personal else None
+                results = self.inline_cache.get((handler_id, owner, normalized))
+                if results is None and prefix_reuse:
+                    results = self._inline_from_prefix(handler_id, owner, normalized)
+                if results is None:
+                    context['inline_results'] = []
+                    await self._execute_commands(commands, context)
+                    results = context['inline_results']
+                if cache_time > 0:
+                    self.inline_cache.set((handler_id, owner, normalized), results, ttl=cache_time)
+                
+                page = results[offset:offset + per_page]
+                next_offset = str(offset + per_page) if offset + per_page < len(results) else ''
+                await query.answer(
+                    results=self._inline_articles(page, offset),
+                    cache_time=cache_time,
+                    is_personal=is_personal,
+                    next_offset=next_offset
+                )
+                
+            except Exception as e:
+                print(self.t('handler_error', 'on_inline', e))
+                import traceback
+                traceback.print_exc()
+        
+        if handler_arg and handler_arg != '*':
+            self.dp.inline_query.register(inline_func, F.query.startswith(handler_arg))
+        else:
+            self.dp.inline_query.register(inline_func)
+    
+    def _inline_from_prefix(self, handler_id: str, owner: Optional[int], query: str) -> Optional[List[Dict]]:
+        """Results for a longer query, filtered from a cached shorter query
+        
+        The empty query never counts as a prefix; its results are usually a
+        default list, not a search the longer query narrows.
+        """
+        words = query.split()
+        for length in range(len(query) - 1, 0, -1):
+            cached = self.inline_cache.get((handler_id, owner, query[:length]))
+            if cached is not None:
+                self.debug_print(self.t('inline_prefix_reused', query[:length]))
+                return [
+                    result for result in cached
+                    if all(word in f"{result['title']} {result['description'] or ''}".lower() for word in words)
+                ]
+        return None
+    
+    def _inline_articles(self, results: List[Dict], offset: int) -> List[InlineQueryResultArticle]:
+        """Build Telegram results for one page"""
+        articles = []
+        for i, result in enumerate(results, offset):
+            result_id = result['id'] or hashlib.blake2b(
+                f"{i}:{result['title']}:{result['text']}".encode('utf-8'), digest_size=16
+            ).hexdigest()
+            articles.append(InlineQueryResultArticle(
+                id=str(result_id)[:64],
+                title=result['title'],
+                description=result['description'],
+                url=result['url'],
+                thumbnail_url=result['thumb'],
+                input_message_content=InputTextMessageContent(
+                    message_text=result['text'],
+                    parse_mode=result['parse_mode']
+                )
+            ))
+        return articles
+    
     async def run_interpreter(self) -> None:
         """Run final interpreter"""
         if not self.bot_token:
             print("❌ No bot token specified!")
             return
         
+        load_telegram()
+        
+        # Static keyboards are kept as parsed data until aiogram is loaded
+        for name, keyboard_data in self.keyboards.items():
+            if keyboard_data['type'] == 'inline':
+                self.keyboards[name] = self._create_inline_keyboard(keyboard_data)
+            else:
+                self.keyboards[name] = self._create_reply_keyboard(keyboard_data)
+        
         # Create bot and dispatcher
-        self.bot = Bot(self.bot_token)
+        self.bot = Bot(self.bot_token, session=self._create_session())
         self.dp = Dispatcher(storage=MemoryStorage())
         
+        if self.throttles:
+            self.dp.message.outer_middleware(self._throttle_middleware)
+            self.dp.callback_query.outer_middleware(self._throttle_middleware)
+            self.dp.inline_query.outer_middleware(self._throttle_middleware)
+        self.dp.callback_query.outer_middleware(self._payload_middleware)
+        
+        # Page navigation goes before user callbacks
+        if self.paged_menus:
+            self.dp.callback_query.register(self._handle_page_callback, F.data.startswith(self.PAGE_PREFIX))
+        
         # Register all handlers
         for handler_data in self.handlers:
             await self._create_handler(handler_data)
@@ -1009,9 +3297,23 @@ class FinalESYBOTInterpreter:
         print("=" * 60)
         print(self.t('handlers_registered', len(self.dp.message.handlers)))
         print(self.t('callbacks_registered', len(self.dp.callback_query.handlers)))
-        print(self.t('keyboards_loaded', len(self.keyboards)))
+        if self.dp.inline_query.handlers:
+            print(self.t('inline_registered', len(self.dp.inline_query.handlers)))
+        print(self.t('keyboards_loaded', len(self.keyboards) + len(self.dynamic_keyboards) + len(self.paged_menus)))
         print(self.t('variables_loaded', len(self.variables)))
         
+        self._load_file_ids()
+        try:
+            self.payloads.load(self._state_path('payloads'))
+        except Exception as e:
+            print(self.t('error_payloads_file', e))
+        autosave_task = asyncio.create_task(self._autosave_payloads())
+        
+        timer_task = None
+        if self.timer_blocks:
+            self._load_timers()
+            timer_task = asyncio.create_task(self._run_timers())
+        
         # Print callback handler info
         if self.dp.callback_query.handlers:
             print(self.t('callback_handlers'))
@@ -1024,6 +3326,19 @@ class FinalESYBOTInterpreter:
         except KeyboardInterrupt:
             print(f"\n{self.t('interpreter_stopped')}")
         finally:
+            if timer_task:
+                timer_task.cancel()
+                self._save_timers()
+            await self._drain_edits()
+            cancelled = await self.task_pool.shutdown() + await self.timer_pool.shutdown()
+            if cancelled:
+                print(self.t('tasks_cancelled', cancelled))
+            await self.fetch_client.close()
+            autosave_task.cancel()
+            self._save_payloads()
+            if self.python_cache_stats:
+                info = self.python_cache_info()
+                print(self.t('python_cache_stats', info['hits'], info['misses']))
             await self.bot.session.close()
 
 def main():
@@ -1035,6 +3350,10 @@ def main():
     if debug_mode:
         sys.argv.remove('--debug')
     
+    check_mode = '--check' in sys.argv
+    if check_mode:
+        sys.argv.remove('--check')
+    
     lang = 'en'
     if '--lang=ru' in sys.argv:
         lang = 'ru'
@@ -1042,26 +3361,63 @@ def main():
     elif '--lang=en' in sys.argv:
         sys.argv.remove('--lang=en')
     
+    # HTTP session overrides, applied after the script's own settings
+    http_options = {}
+    for arg in list(sys.argv):
+        if arg.startswith('--api='):
+            http_options['api'] = arg[6:]
+        elif arg == '--api-local':
+            http_options['local'] = 'true'
+        elif arg.startswith('--http-') and '=' in arg:
+            key, value = arg[7:].split('=', 1)
+            http_options[key.replace('-', '_')] = value
+        else:
+            continue
+        sys.argv.remove(arg)
+    
     if len(sys.argv) < 2:
         print("\n📚 Usage: python esybot_interpreter.py <file.esi> [--debug] [--lang=en|ru]")
         print("🔧 --debug - detailed debugging")
         print("🔧 --lang - language selection (en/ru)")
+        print("🔧 --check - parse and compile the script without starting the bot")
+        print("🔧 --api=URL [--api-local] - custom / self-hosted Bot API server")
+        print("🔧 --http-limit=N --http-per-host=N --http-keepalive=30s --http-timeout=60s --http-dns-cache=1h")
         print("\n   Change log:")
         print("   🐍 Python blocks with functions (esybot_set, esybot_get, esybot_send)")
+        print("   ♻️ Memoized Python blocks (python(cache=60s key=$data) { })")
+        print("   ⛔ Python block budgets (python_budget time=10s steps=1000000 memory=64MB, python(time=1s) { })")
+        print("   🧵 Background work (spawn { }, esybot_spawn, spawn_limit)")
+        print("   ⚡ Concurrent commands (parallel { })")
+        print("   🌐 HTTP requests (fetch \"url\" -> var timeout=2s cache=30s, esybot_fetch)")
         print("   📊 All variables and their replacement ($variable)")
         print("   🎯 All handlers (on_start, on_message, on_callback, media)")
+        print("   🔎 Inline mode (on_inline { result \"Title\" \"Text\" }, esybot_result)")
+        print("   ⏰ Timers (every 10m, at \"09:00\", after 30s)")
         print("   📝 All commands (send, reply, edit, answer_callback)")
+        print("   📎 Media (send_photo, send_document, send_audio) with file_id cache")
         print("   ⌨️ Keyboards with new_row, URL buttons")
+        print("   🧩 Templated keyboards ($variables, for item in $list)")
+        print("   📚 Paged menus (paged_menu name source=$items per_page=8)")
+        print("   🗂️ Data tables (table products from \"products.csv\" key=sku index=category)")
+        print("   🚦 Flood control (throttle 5/s burst=10, on_throttled)")
         print("   🎨 Parse mode (Markdown, HTML)")
+        print("   🌐 Tunable Bot API session (http limit=100 keepalive=30s, api_server \"http://localhost:8081\")")
+        print("   🔍 Fast startup, script check without Telegram (--check)")
         print("   ⚡ Real-time interpretation")
         return
     
     interpreter = FinalESYBOTInterpreter(debug_mode=debug_mode, lang=lang)
     
+    if check_mode:
+        sys.exit(0 if interpreter.check_file(sys.argv[1]) else 1)
+    
     try:
         if not interpreter.parse_file(sys.argv[1]):
             return
         
+        if http_options:
+            interpreter.configure_http(http_options)
+        
         if not interpreter.bot_token or interpreter.bot_token == "YOUR_TOKEN_HERE":
             print(interpreter.t('no_token'))
             print(interpreter.t('token_instructions'))
@@ -0,0 +1,111 @@
+"""FetchClient against a local aiohttp.web server on 127.0.0.1"""
+
+import asyncio
+import socket
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from main import FetchClient
+
+
+class StandIn:
+    """Local HTTP server recording requests"""
+
+    def __init__(self):
+        self.hits = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = web.Application()
+        self.app.router.add_get('/item/{id}', self.item)
+        self.app.router.add_get('/slow/{id}', self.slow)
+        self.app.router.add_get('/me', self.me)
+
+    async def item(self, request):
+        self.hits.append((request.match_info['id'], request.headers.get('If-None-Match')))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.json_response({'id': request.match_info['id']}, headers={'ETag': '"v1"'})
+
+    async def me(self, request):
+        self.hits.append(('me', request.headers.get('Authorization')))
+        return web.json_response({'user': request.headers.get('Authorization')})
+
+    async def slow(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return web.Response(text=request.match_info['id'])
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+def run(test):
+    async def main():
+        client = FetchClient(per_host=2)
+        try:
+            async with StandIn() as server:
+                await test(client, server)
+        finally:
+            await client.close()
+    asyncio.run(main())
+
+
+def test_cache_hit_within_ttl():
+    async def test(client, server):
+        first = await client.fetch(f"{server.url}/item/1", cache=60)
+        second = await client.fetch(f"{server.url}/item/1", cache=60)
+        assert first == second == {'id': '1'}
+        assert server.hits == [('1', None)]
+    run(test)
+
+
+def test_etag_revalidation():
+    async def test(client, server):
+        await client.fetch(f"{server.url}/item/2", cache=0.05)
+        await asyncio.sleep(0.1)
+        body = await client.fetch(f"{server.url}/item/2", cache=0.05)
+        assert body == {'id': '2'}
+        assert server.hits == [('2', None), ('2', '"v1"')]
+    run(test)
+
+
+def test_cache_keyed_by_headers():
+    async def test(client, server):
+        alice = await client.fetch(f"{server.url}/me", cache=60, headers={'Authorization': 'alice'})
+        bob = await client.fetch(f"{server.url}/me", cache=60, headers={'Authorization': 'bob'})
+        again = await client.fetch(f"{server.url}/me", cache=60, headers={'authorization': 'alice'})
+        assert (alice, bob, again) == ({'user': 'alice'}, {'user': 'bob'}, {'user': 'alice'})
+        assert server.hits == [('me', 'alice'), ('me', 'bob')]
+    run(test)
+
+
+def test_per_host_limit():
+    async def test(client, server):
+        bodies = await asyncio.gather(*(client.fetch(f"{server.url}/slow/{i}") for i in range(6)))
+        assert bodies == [str(i) for i in range(6)]
+        assert server.max_in_flight == 2
+    run(test)
+
+
+def test_connection_error():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    async def test(client, server):
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await client.fetch(f"http://127.0.0.1:{port}/", timeout=2)
+        assert await client.fetch(f"{server.url}/item/3") == {'id': '3'}
+    run(test)